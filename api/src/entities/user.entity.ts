@@ -43,6 +43,9 @@ export class User {
   @Column({ type: 'boolean', name: 'is_chat', default: false })
   isChat!: boolean;
 
+  @Column({ type: 'int', name: 'events_version', default: 0 })
+  eventsVersion!: number;
+
   @CreateDateColumn({ type: 'timestamptz', name: 'created_at' })
   createdAt!: Date;
 
@@ -234,6 +234,7 @@ export class EventsService {
     if (dto.participants?.length) {
       await this.copyToParticipants(saved, dto.participants);
     }
+    await this.bumpEventsVersion([userId, ...(dto.participants ?? [])]);
 
     return { id: saved.id };
   }
@@ -249,10 +250,12 @@ export class EventsService {
         cancelDate: date,
         eventId: event.id,
       });
+      await this.bumpEventsVersion([userId]);
       return { canceled: true };
     }
 
     await this.events.delete({ id: event.id });
+    await this.bumpEventsVersion([userId]);
     return { deleted: true };
   }
 
@@ -275,6 +278,14 @@ export class EventsService {
     }
   }
 
+  // The bots cache rendered calendars by tg_users.events_version, every write to a user's events must bump it.
+  private async bumpEventsVersion(tgIds: number[]) {
+    if (!tgIds.length) {
+      return;
+    }
+    await this.users.increment({ tgId: In(tgIds.map(String)) }, 'eventsVersion', 1);
+  }
+
   private async getUser(tgId: number) {
     const user = await this.users.findOne({ where: { tgId: String(tgId) } });
     if (!user) {
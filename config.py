@@ -7,6 +7,27 @@ load_dotenv(".env")
 
 MONTH_NAMES = ["января", "февраля", "марта", "апреля", "мая", "июня", "июля", "августа", "сентября", "октября", "ноября", "декабря"]
 NEAREST_EVENTS_DAYS = 10
+REMINDER_WINDOW_HOURS = int(os.getenv("REMINDER_WINDOW_HOURS", "6"))
+REMINDER_RESYNC_MINUTES = int(os.getenv("REMINDER_RESYNC_MINUTES", "5"))
+REMINDER_DELIVERY_CONCURRENCY = int(os.getenv("REMINDER_DELIVERY_CONCURRENCY", "20"))
+REMINDER_DELIVERY_RETRIES = int(os.getenv("REMINDER_DELIVERY_RETRIES", "3"))
+REMINDER_CATCHUP_MINUTES = int(os.getenv("REMINDER_CATCHUP_MINUTES", "180"))  # how far back missed minutes are replayed
+REMINDER_LEDGER_RETENTION_DAYS = int(os.getenv("REMINDER_LEDGER_RETENTION_DAYS", "7"))
+# Minutes before an event its reminders go out, e.g. "0,15,60,1440"; 0 is the "starts now" reminder.
+REMINDER_LEADS_MINUTES = tuple(sorted({int(item) for item in os.getenv("REMINDER_LEADS_MINUTES", "0,60").split(",") if item.strip()}))
+REMINDER_QUEUE_HOURS = int(os.getenv("REMINDER_QUEUE_HOURS", "48"))  # how far ahead reminder_queue is materialized
+REMINDER_QUEUE_REFILL_HOURS = int(os.getenv("REMINDER_QUEUE_REFILL_HOURS", "24"))
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "1"))  # cron_handler worker processes
+REMINDER_FAILURE_LIMIT = int(os.getenv("REMINDER_FAILURE_LIMIT", "3"))  # failed sends before a recipient is skipped
+TG_RATE_LIMIT = float(os.getenv("TG_RATE_LIMIT", "25"))  # messages/sec for the whole bot
+TG_CHAT_RATE_LIMIT = float(os.getenv("TG_CHAT_RATE_LIMIT", "1"))  # messages/sec for one chat
+MAX_RATE_LIMIT = float(os.getenv("MAX_RATE_LIMIT", "25"))
+MAX_CHAT_RATE_LIMIT = float(os.getenv("MAX_CHAT_RATE_LIMIT", "1"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))  # cached tg/max id -> tg_users row lookups per process
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))  # bounds staleness between bot processes
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "5000"))  # rendered calendar keyboards per process
+RENDER_CACHE_TTL_SECONDS = int(os.getenv("RENDER_CACHE_TTL_SECONDS", "60"))  # bounds staleness after writes that skip events_version
+CACHE_STATS_INTERVAL_SECONDS = int(os.getenv("CACHE_STATS_INTERVAL_SECONDS", "600"))  # how often the bots log cache hit rates
 
 
 TOKEN = os.getenv("TG_BOT_TOKEN")
@@ -2,17 +2,26 @@ import argparse
 import asyncio
 import datetime
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from zoneinfo import ZoneInfo
 
 import telegram
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-from config import TOKEN, database_url
+from config import REMINDER_CATCHUP_MINUTES, REMINDER_LEADS_MINUTES, REMINDER_LEDGER_RETENTION_DAYS, REMINDER_SHARDS, TOKEN, database_url
+from database import session as db_session
 from database.db_controller import db_controller
-from i18n import resolve_user_locale, tr
-from max_bot.client import build_max_api
+from database.lease import run_lease
+from entities import DayEvent
+from i18n import format_localized_date, normalize_locale, tr
+from max_bot.client import MaxApi, build_max_api
 from max_bot.compat import InlineKeyboardButton as MaxInlineKeyboardButton
 from max_bot.compat import InlineKeyboardMarkup as MaxInlineKeyboardMarkup
+from reminder_delivery import ReminderDispatcher
 
 engine = create_async_engine(database_url, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -20,11 +29,24 @@ AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_co
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_NAME = "cron"
+REMINDERS_PER_MESSAGE = 10
 
-def _build_reminder_text(event: dict, send_now: bool, locale: str | None = None) -> str:
+
+def _lead_text(lead_minutes: int, locale: str | None = None) -> str:
+    if lead_minutes == 60:
+        return tr("Через 1 час:", locale)
+    if lead_minutes % 1440 == 0:
+        return tr("Через {count} дн.:", locale).format(count=lead_minutes // 1440)
+    if lead_minutes % 60 == 0:
+        return tr("Через {count} ч.:", locale).format(count=lead_minutes // 60)
+    return tr("Через {count} мин.:", locale).format(count=lead_minutes)
+
+
+def _build_reminder_text(event: dict, lead_minutes: int, locale: str | None = None) -> str:
     text = tr("Напоминание о событии", locale)
-    if not send_now:
-        text += f"\n{tr('Через 1 час:', locale)}"
+    if lead_minutes:
+        text += f"\n{_lead_text(lead_minutes, locale)}"
     start_time = event.get("start_time")
     start_str = start_time.strftime("%H:%M") if start_time else ""
     description = event.get("description") or ""
@@ -32,101 +54,408 @@ def _build_reminder_text(event: dict, send_now: bool, locale: str | None = None)
     return text
 
 
-async def send_messages(send_now: bool = False):
+def _build_reminders_text(reminders: list[tuple[int, dict]], locale: str | None = None) -> str:
+    if len(reminders) == 1:
+        lead_minutes, event = reminders[0]
+        return _build_reminder_text(event, lead_minutes, locale=locale)
+
+    lines = [tr("Напоминание о событиях", locale)]
+    current_lead = None
+    for lead_minutes, event in sorted(reminders, key=lambda item: item[0]):
+        if lead_minutes != current_lead:
+            current_lead = lead_minutes
+            lines.append(_lead_text(lead_minutes, locale) if lead_minutes else tr("Сейчас:", locale))
+        start_time = event.get("start_time")
+        start_str = start_time.strftime("%H:%M") if start_time else ""
+        lines.append(f"{start_str} {event.get('description') or ''}".strip())
+    return "\n".join(lines)
+
+
+def _reschedule_buttons(reminders: list[tuple[int, dict]], locale: str | None, button_cls) -> list[list]:
+    events = [event for _, event in reminders if event.get("event_id")]
+    if len(reminders) == 1:
+        if not events:
+            return []
+        event_id = events[0]["event_id"]
+        return [
+            [button_cls(tr("Перенести на 1 час", locale), callback_data=f"reschedule_event_{event_id}_hour")],
+            [button_cls(tr("Перенести на завтра", locale), callback_data=f"reschedule_event_{event_id}_day")],
+        ]
+
+    rows = []
+    for event in events:
+        start_time = event.get("start_time")
+        label = f"{start_time.strftime('%H:%M') if start_time else ''} {(event.get('description') or '')[:20]}".strip()
+        rows.append(
+            [
+                button_cls(f"{label} · {tr('+1 час', locale)}", callback_data=f"reschedule_event_{event['event_id']}_hour"),
+                button_cls(f"{label} · {tr('Завтра', locale)}", callback_data=f"reschedule_event_{event['event_id']}_day"),
+            ]
+        )
+    return rows
+
+
+async def send_tg_reminders(bot: telegram.Bot, reminders: list[tuple[int, dict]]) -> None:
+    """One message for all (lead_minutes, event) reminders of the same Telegram chat."""
+    chat_id = reminders[0][1].get("tg_id")
+    if not chat_id:
+        return
+    locale = normalize_locale(reminders[0][1].get("language_code"))
+    text = _build_reminders_text(reminders, locale=locale)
+    buttons = _reschedule_buttons(reminders, locale, InlineKeyboardButton)
+    reply_markup = InlineKeyboardMarkup(buttons) if buttons else None
+
+    await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+
+
+async def send_max_reminders(max_api: MaxApi, reminders: list[tuple[int, dict]]) -> None:
+    """One message for all (lead_minutes, event) reminders of the same MAX user."""
+    user_id = reminders[0][1].get("max_id")
+    if not user_id:
+        return
+    locale = normalize_locale(reminders[0][1].get("language_code"))
+    text = _build_reminders_text(reminders, locale=locale)
+    buttons = _reschedule_buttons(reminders, locale, MaxInlineKeyboardButton)
+    attachments = MaxInlineKeyboardMarkup(buttons).to_attachments() if buttons else None
+    await max_api.send_message(text=text, user_id=user_id, attachments=attachments, include_menu=False, locale=locale)
+
+
+async def send_tg_reminder(bot: telegram.Bot, event: dict, lead_minutes: int) -> None:
+    await send_tg_reminders(bot, [(lead_minutes, event)])
+
+
+async def send_max_reminder(max_api: MaxApi, event: dict, lead_minutes: int) -> None:
+    await send_max_reminders(max_api, [(lead_minutes, event)])
+
+
+def _reminder_key(lead_minutes: int, occurrence: dict) -> tuple[int, datetime.datetime, int]:
+    return occurrence["event_id"], occurrence["event_dt"], lead_minutes
+
+
+def _group_reminders(items: list[tuple[int, dict]]) -> list[tuple[str, int, list[tuple[int, dict]]]]:
+    """(platform, chat_id, reminders) messages: one per chat and platform, at most REMINDERS_PER_MESSAGE events each."""
+    groups: dict[tuple[str, int], list[tuple[int, dict]]] = {}
+    for lead_minutes, event in items:
+        if event.get("tg_id"):
+            groups.setdefault(("tg", event["tg_id"]), []).append((lead_minutes, event))
+        if event.get("max_id"):
+            groups.setdefault(("max", event["max_id"]), []).append((lead_minutes, event))
+
+    messages = []
+    for (platform, chat_id), reminders in groups.items():
+        for offset in range(0, len(reminders), REMINDERS_PER_MESSAGE):
+            messages.append((platform, chat_id, reminders[offset : offset + REMINDERS_PER_MESSAGE]))
+    return messages
+
+
+def _delivery_job(platform: str, chat_id: int, reminders: list[tuple[int, dict]], bot: telegram.Bot, max_api: MaxApi) -> tuple:
+    if platform == "tg":
+        return platform, chat_id, partial(send_tg_reminders, bot, reminders)
+    return platform, chat_id, partial(send_max_reminders, max_api, reminders)
+
+
+def build_delivery_jobs(items: list[tuple[int, dict]], bot: telegram.Bot, max_api: MaxApi) -> list:
+    """Group (lead_minutes, event) reminders by recipient: one message per chat and platform.
+
+    Long groups are split into messages of REMINDERS_PER_MESSAGE events to keep keyboards small.
+    """
+    return [_delivery_job(platform, chat_id, reminders, bot, max_api) for platform, chat_id, reminders in _group_reminders(items)]
+
+
+async def deliver_unsent(
+    items: list[tuple[int, dict]],
+    bot: telegram.Bot,
+    max_api: MaxApi,
+    dispatcher: ReminderDispatcher,
+    reclaim_before: datetime.datetime | None = None,
+) -> int:
+    """Deliver (lead_minutes, occurrence) pairs that are not in the sent_reminders ledger yet.
+
+    A reminder is confirmed in the ledger once one of its messages went out; when all of them failed the claim
+    is released. `reclaim_before` is when the caller's lease was taken: older unconfirmed claims are from a crashed run.
+    """
+    claimed = await db_controller.claim_reminders([_reminder_key(lead, occurrence) for lead, occurrence in items], reclaim_before)
+    if len(claimed) < len(items):
+        logger.info(f"** skipped {len(items) - len(claimed)} reminders already in the ledger")
+    messages = _group_reminders([(lead, occurrence) for lead, occurrence in items if _reminder_key(lead, occurrence) in claimed])
+    jobs = [_delivery_job(platform, chat_id, reminders, bot, max_api) for platform, chat_id, reminders in messages]
+    try:
+        results = await dispatcher.deliver_each(jobs)
+    except BaseException:
+        await db_controller.release_reminders(list(claimed))
+        raise
+
+    sent = {_reminder_key(lead, occurrence) for (_, _, reminders), ok in zip(messages, results) if ok for lead, occurrence in reminders}
+    attempted = {_reminder_key(lead, occurrence) for _, _, reminders in messages for lead, occurrence in reminders}
+    failed = attempted - sent
+    await db_controller.confirm_reminders(list(claimed - failed))
+    await db_controller.release_reminders(list(failed))
+    await _record_delivery_outcomes(dispatcher)
+    return sum(results)
+
+
+async def _record_delivery_outcomes(dispatcher: ReminderDispatcher) -> None:
+    """Count a failure for recipients that blocked the bot, start the count over for the ones a message reached."""
+    for platform, chat_ids in dispatcher.pop_unreachable().items():
+        await db_controller.record_delivery_failures(chat_ids, platform=platform)
+    for platform, chat_ids in dispatcher.pop_reached().items():
+        await db_controller.reset_delivery_failures(chat_ids, platform=platform)
+
+
+async def deliver_jobs(jobs: list, dispatcher: ReminderDispatcher) -> list[bool]:
+    """Send (platform, chat_id, send) jobs and keep the recipients' delivery failure counters up to date.
+
+    Returns whether each job was delivered.
+    """
+    results = await dispatcher.deliver_each(jobs)
+    await _record_delivery_outcomes(dispatcher)
+    return results
+
+
+def _build_digest_text(day: datetime.date, events: list[DayEvent], locale: str | None = None) -> str:
+    lines = [tr("Ваши события на {date}:", locale).format(date=format_localized_date(day, locale))]
+    for event in events:
+        lines.append(f"{event.start_time.strftime('%H:%M')} {event.description or ''}".strip())
+    return "\n".join(lines)
+
+
+async def send_digests(
+    now: datetime.datetime,
+    shard: tuple[int, int] | None,
+    bot: telegram.Bot,
+    max_api: MaxApi,
+    dispatcher: ReminderDispatcher,
+) -> int:
+    """Daily agenda for users whose digest_time is this minute.
+
+    Users are bucketed by time zone: "today" is computed once per zone and each bucket is expanded
+    on that zone's calendar with one query. A digest is claimed per (user, local date) in the sent_digests
+    ledger before it is sent, so a replayed minute or an overlapping run does not send it twice.
+    """
+    jobs = []
+    owners: list[tuple[int, datetime.date]] = []
+    for zone, users in (await db_controller.get_digest_buckets(now, shard=shard)).items():
+        user_tz = ZoneInfo(zone)
+        today = now.astimezone(user_tz).date()
+        async with AsyncSessionLocal() as session:
+            events_by_user = await db_controller.get_users_day_events([user["user_id"] for user in users], today, user_tz, session)
+
+        users = [user for user in users if events_by_user.get(user["user_id"])]
+        claimed = await db_controller.claim_digests([user["user_id"] for user in users], today)
+        if len(claimed) < len(users):
+            logger.info(f"** skipped {len(users) - len(claimed)} digests for {today} already in the ledger")
+        for user in users:
+            if user["user_id"] not in claimed:
+                continue
+            events = events_by_user[user["user_id"]]
+            locale = normalize_locale(user["language_code"])
+            text = _build_digest_text(today, events, locale=locale)
+            if user["tg_id"]:
+                jobs.append(("tg", user["tg_id"], partial(bot.send_message, chat_id=user["tg_id"], text=text)))
+                owners.append((user["user_id"], today))
+            if user["max_id"]:
+                send = partial(max_api.send_message, text=text, user_id=user["max_id"], include_menu=False, locale=locale)
+                jobs.append(("max", user["max_id"], send))
+                owners.append((user["user_id"], today))
+
+    if not jobs:
+        return 0
+    logger.info(f"** sending {len(jobs)} daily digests")
+    try:
+        results = await deliver_jobs(jobs, dispatcher)
+    except BaseException:
+        await _release_digests(set(owners))
+        raise
+    # A digest counts as sent once one of the user's platforms received it.
+    await _release_digests(set(owners) - {owner for owner, ok in zip(owners, results) if ok})
+    return sum(results)
+
+
+async def _release_digests(owners: set[tuple[int, datetime.date]]) -> None:
+    by_day: dict[datetime.date, list[int]] = {}
+    for user_id, day in owners:
+        by_day.setdefault(day, []).append(user_id)
+    for day, user_ids in by_day.items():
+        await db_controller.release_digests(user_ids, day)
+
+
+def catch_up_start(last_completed: datetime.datetime | None, now: datetime.datetime) -> datetime.datetime | None:
+    """First minute that was not processed before `now`, limited to REMINDER_CATCHUP_MINUTES back."""
+    if last_completed is None:
+        return None
+    start = max(last_completed + datetime.timedelta(minutes=1), now - datetime.timedelta(minutes=REMINDER_CATCHUP_MINUTES))
+    return start if start < now else None
+
+
+def reminders_between(
+    occurrences: list[dict],
+    start_dt: datetime.datetime,
+    end_dt: datetime.datetime,
+    leads: tuple[int, ...] = REMINDER_LEADS_MINUTES,
+) -> list[tuple[int, dict]]:
+    """(lead_minutes, occurrence) pairs whose reminder time falls into [start_dt, end_dt).
+
+    `occurrences` must cover [start_dt + min(leads), end_dt + max(leads)).
+    """
+    items = []
+    for occurrence in occurrences:
+        for lead in leads:
+            if start_dt <= occurrence["event_dt"] - datetime.timedelta(minutes=lead) < end_dt:
+                items.append((lead, occurrence))
+    return items
+
+
+def _checkpoint_name(shard: tuple[int, int] | None) -> str:
+    return CHECKPOINT_NAME if shard is None else f"{CHECKPOINT_NAME}_{shard[0]}_of_{shard[1]}"
+
+
+async def _process_minute(
+    now: datetime.datetime,
+    shard: tuple[int, int] | None,
+    bot: telegram.Bot,
+    max_api: MaxApi,
+    dispatcher: ReminderDispatcher,
+    leased_at: datetime.datetime | None = None,
+) -> tuple[int, int]:
+    checkpoint_name = _checkpoint_name(shard)
+    found = delivered = 0
+
+    missed_from = catch_up_start(await db_controller.get_reminder_checkpoint(checkpoint_name), now)
+    if missed_from is not None:
+        async with AsyncSessionLocal() as session:
+            missed = await db_controller.get_events_all_users_in_range(
+                start_dt=missed_from + datetime.timedelta(minutes=min(REMINDER_LEADS_MINUTES)),
+                end_dt=now + datetime.timedelta(minutes=max(REMINDER_LEADS_MINUTES)),
+                session=session,
+                shard=shard,
+            )
+        items = reminders_between(missed, missed_from, now)
+        logger.info(f"** catching up {len(items)} reminders since {missed_from}")
+        found += len(items)
+        delivered += await deliver_unsent(items, bot, max_api, dispatcher, reclaim_before=leased_at)
+
+    await db_controller.extend_reminder_queue(now)
+    limit = 400
+    cursor = None
+    while True:
+        async with AsyncSessionLocal() as session:
+            items, cursor = await db_controller.get_due_reminders(
+                now=now, leads_minutes=REMINDER_LEADS_MINUTES, session=session, limit=limit, after=cursor, shard=shard
+            )
+
+        logger.info(f"** len events: {len(items)}")
+        found += len(items)
+        delivered += await deliver_unsent(items, bot, max_api, dispatcher, reclaim_before=leased_at)
+        if cursor is None:
+            break
+    logger.info(f"** delivered {delivered} of {found} reminders")
+    await send_digests(now, shard, bot, max_api, dispatcher)
+
+    await db_controller.set_reminder_checkpoint(checkpoint_name, now)
+    if now.minute == 0 and (shard is None or shard[0] == 0):
+        await db_controller.prune_sent_reminders(before=now - datetime.timedelta(days=REMINDER_LEDGER_RETENTION_DAYS))
+        await db_controller.prune_sent_digests(before=(now - datetime.timedelta(days=REMINDER_LEDGER_RETENTION_DAYS)).date())
+        await db_controller.prune_reminder_queue(before=now)
+    return found, delivered
+
+
+async def send_messages(now: datetime.datetime | None = None, shard: tuple[int, int] | None = None) -> dict:
+    """Send every reminder due this minute, for all REMINDER_LEADS_MINUTES, plus the ones missed since the last run.
+
+    `shard` is (index, count): only recipients with user_id % count == index are handled.
+    A run that finds the previous one still holding the lease does nothing; its minute is caught up later.
+    Returns the run statistics collected by the sharded coordinator.
+    """
     bot = telegram.Bot(token=TOKEN)
     max_api = await build_max_api()
+    # Sibling shards send at the same time, each one gets its share of the platform rate limits.
+    dispatcher = ReminderDispatcher(shards=shard[1] if shard else 1)
+    started = time.monotonic()
+    now = (now or datetime.datetime.now(datetime.timezone.utc)).replace(second=0, microsecond=0)
+    found = delivered = 0
+    skipped = False
     try:
-        now = datetime.datetime.now(datetime.timezone.utc)
-        now = now.replace(second=0, microsecond=0)
-        if not send_now:
-            now += datetime.timedelta(hours=1)
-        limit = 400
-        offset = 0
-        while True:
-            async with AsyncSessionLocal() as session:
-                events_tg = await db_controller.get_current_day_events_all_users(event_dt=now, session=session, limit=limit, offset=offset)
-                events_max = await db_controller.get_current_day_events_all_users(
-                    event_dt=now, session=session, limit=limit, offset=offset, platform="max"
-                )
-
-            logger.info(f"** len events tg: {len(events_tg)}")
-            logger.info(f"** len events max: {len(events_max)}")
-            if not events_tg and not events_max:
-                await engine.dispose()
-                break
-
-            for event in events_tg:
-                chat_id = event.get("tg_id")
-                if not chat_id:
-                    continue
-                locale = await resolve_user_locale(chat_id, platform="tg")
-                text = _build_reminder_text(event, send_now, locale=locale)
-
-                event_id = event.get("event_id")
-                reply_markup = None
-                if event_id:
-                    buttons = [
-                        [
-                            InlineKeyboardButton(
-                                tr("Перенести на 1 час", locale),
-                                callback_data=f"reschedule_event_{event_id}_hour",
-                            )
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                tr("Перенести на завтра", locale),
-                                callback_data=f"reschedule_event_{event_id}_day",
-                            )
-                        ],
-                    ]
-                    reply_markup = InlineKeyboardMarkup(buttons)
-
-                await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
-                await asyncio.sleep(0.001)
-
-            for event in events_max:
-                user_id = event.get("tg_id")
-                if not user_id:
-                    continue
-                locale = await resolve_user_locale(user_id, platform="max")
-                text = _build_reminder_text(event, send_now, locale=locale)
-                event_id = event.get("event_id")
-                attachments = None
-                if event_id:
-                    buttons = [
-                        [
-                            MaxInlineKeyboardButton(
-                                tr("Перенести на 1 час", locale),
-                                callback_data=f"reschedule_event_{event_id}_hour",
-                            )
-                        ],
-                        [
-                            MaxInlineKeyboardButton(
-                                tr("Перенести на завтра", locale),
-                                callback_data=f"reschedule_event_{event_id}_day",
-                            )
-                        ],
-                    ]
-                    reply_markup = MaxInlineKeyboardMarkup(buttons)
-                    attachments = reply_markup.to_attachments()
-                await max_api.send_message(text=text, user_id=user_id, attachments=attachments, include_menu=False, locale=locale)
-                await asyncio.sleep(0.001)
-
-            await engine.dispose()
-            offset += limit
+        async with run_lease(_checkpoint_name(shard)) as acquired:
+            if acquired:
+                leased_at = datetime.datetime.now(datetime.timezone.utc)
+                found, delivered = await _process_minute(now, shard, bot, max_api, dispatcher, leased_at)
+            else:
+                skipped = True
+                logger.warning(f"** previous reminder run is still active, {now} is left for catch-up")
     finally:
         await max_api.close()
+        await engine.dispose()
+        await db_session.engine.dispose()
+
+    duration = time.monotonic() - started
+    if duration > 60:
+        logger.warning(f"** reminder run for {now} overran the minute: {duration:.1f}s, the next runs will catch up")
+    return {
+        "shard": shard[0] if shard else 0,
+        "found": found,
+        "delivered": delivered,
+        "skipped": skipped,
+        "duration": duration,
+        "lag": (datetime.datetime.now(datetime.timezone.utc) - now).total_seconds(),
+    }
+
+
+def _run_shard(now: datetime.datetime, shard: tuple[int, int]) -> dict:
+    logging.basicConfig(format=f"%(asctime)s - shard {shard[0]} - %(levelname)s - %(message)s", level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    return asyncio.run(send_messages(now=now, shard=shard))
+
+
+async def _prepare_sharded_run(now: datetime.datetime) -> None:
+    # Fill the queue once here so the workers do not all materialize the same window.
+    await db_controller.extend_reminder_queue(now)
+    await db_session.engine.dispose()
+
+
+def run_sharded(shards: int) -> list[dict]:
+    """Coordinator: run one worker process per user_id % shards partition and log their completion and lag."""
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    asyncio.run(_prepare_sharded_run(now))
+
+    stats = []
+    with ProcessPoolExecutor(max_workers=shards, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(_run_shard, now, (index, shards)): index for index in range(shards)}
+        for future in as_completed(futures):
+            try:
+                stats.append(future.result())
+            except Exception:  # noqa: BLE001
+                logger.exception(f"Reminder shard {futures[future]} failed")
+                stats.append({"shard": futures[future], "found": 0, "delivered": 0, "skipped": False, "duration": 0.0, "lag": None})
+
+    stats.sort(key=lambda item: item["shard"])
+    for item in stats:
+        if item["lag"] is None:
+            lag = "failed"
+        elif item["skipped"]:
+            lag = "skipped, previous run still active"
+        else:
+            lag = f"lag {item['lag']:.1f}s"
+        logger.info(f"** shard {item['shard']}: delivered {item['delivered']} of {item['found']}, {lag}")
+    lags = [item["lag"] for item in stats if item["lag"] is not None]
+    logger.info(f"** {len(lags)} of {shards} shards completed, max lag {max(lags, default=0.0):.1f}s")
+    return stats
 
 
 if __name__ == "__main__":
     logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S%z", level=logging.INFO)
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    parser = argparse.ArgumentParser(description="Choose datetime")
-    parser.add_argument("--now", type=bool, help="send events NOW", default=False)
+    parser = argparse.ArgumentParser(description="Send reminders due this minute")
+    parser.add_argument("--now", type=bool, help="deprecated, does nothing: the plain run sends every lead time", default=False)
 
-    args = parser.parse_args()
+    parser.add_argument("--shards", type=int, help="worker processes, each takes a user_id %% shards partition", default=REMINDER_SHARDS)
 
-    logger.info(f"Args: {args.now}")
+    args = parser.parse_args()
 
-    asyncio.run(send_messages(send_now=args.now))
+    if args.now:
+        # Old crontabs run the plain entry and `--now` every minute; the plain run already covers every lead time.
+        logger.warning("--now is deprecated and does nothing, the plain run sends reminders for all REMINDER_LEADS_MINUTES")
+    elif args.shards > 1:
+        run_sharded(args.shards)
+    else:
+        asyncio.run(send_messages())
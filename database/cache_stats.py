@@ -0,0 +1,28 @@
+import logging
+import time
+
+from config import CACHE_STATS_INTERVAL_SECONDS
+from database.identity_cache import identity_cache
+from database.render_cache import calendar_cache
+
+logger = logging.getLogger(__name__)
+
+_CACHES = {"identity": identity_cache, "calendar": calendar_cache}
+_last_logged = time.monotonic()
+
+
+def log_cache_stats() -> None:
+    """Log the hit rate of the in-process caches, at most once per CACHE_STATS_INTERVAL_SECONDS.
+
+    The bots call it after every update, so an idle bot logs nothing.
+    """
+    global _last_logged
+    now = time.monotonic()
+    if now - _last_logged < CACHE_STATS_INTERVAL_SECONDS:
+        return
+    _last_logged = now
+    for name, cache in _CACHES.items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0.0
+        logger.info(f"{name} cache: {hit_rate:.1%} hits of {lookups} lookups, {stats['size']} entries")
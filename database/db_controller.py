@@ -1,24 +1,68 @@
 import logging
 from calendar import monthrange
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Literal
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy import Date, and_, case, cast, delete, extract, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, raiseload
 
 import config
 from config import NEAREST_EVENTS_DAYS
+from database.identity_cache import CachedUser, identity_cache, request_user
 from database.models.event_models import CanceledEvent, DbEvent, EventParticipant
 from database.models.note_model import DbNote
+from database.models.reminder_models import ReminderCheckpoint, ReminderQueue, SentDigest, SentReminder
 from database.models.user_model import User as DB_User
 from database.models.user_model import UserRelation
+from database.recurrence import effective_month_day, expand_occurrences, expand_occurrences_batch
 from database.session import AsyncSessionLocal
-from entities import Event, MaxUser, Recurrent, TgUser
+from entities import DayEvent, DayView, Event, MaxUser, Recurrent, TgUser
 
 logger = logging.getLogger(__name__)
 
+REMINDER_QUEUE_CHECKPOINT = "reminder_queue"
+# Largest daylight saving shift in the tz database (Antarctica/Troll moves by two hours).
+REMINDER_DST_SLACK = timedelta(hours=2)
+
+# tg_users columns kept in the identity cache snapshot: the ones TgUser/MaxUser carry, the delivery
+# failure counters a profile save resets and the events version the calendar render cache is keyed by.
+USER_PROFILE_COLUMNS = (
+    "is_active",
+    "username",
+    "first_name",
+    "last_name",
+    "language_code",
+    "time_zone",
+    "city",
+    "tg_delivery_failures",
+    "max_delivery_failures",
+    "events_version",
+)
+
+# Event columns the calendar and reminder paths read. Selecting them instead of DbEvent skips the
+# selectin loads of participants and canceled_events, two extra round-trips per query.
+EVENT_OCCURRENCE_COLUMNS = (
+    DbEvent.id,
+    DbEvent.user_id,
+    DbEvent.description,
+    DbEvent.emoji,
+    DbEvent.start_time,
+    DbEvent.start_at,
+    DbEvent.stop_at,
+    DbEvent.single_event,
+    DbEvent.daily,
+    DbEvent.weekly,
+    DbEvent.monthly,
+    DbEvent.annual_day,
+    DbEvent.annual_month,
+)
+
 
 class DBController:
     @staticmethod
@@ -47,8 +91,25 @@ class DBController:
     ) -> int | None:
         if external_id is None:
             return None
+        platform = cls._normalize_platform(platform)
+        cached = identity_cache.get(platform, external_id)
+        if cached is not None:
+            return cached.row_id
         user_col = cls._user_id_column(platform)
-        return (await session.execute(select(DB_User.id).where(user_col == int(external_id)))).scalar_one_or_none()
+        row_id = (await session.execute(select(DB_User.id).where(user_col == int(external_id)))).scalar_one_or_none()
+        if row_id is not None:
+            identity_cache.put(platform, external_id, CachedUser(row_id=int(row_id)))
+        return row_id
+
+    @staticmethod
+    def _cache_user(user) -> CachedUser:
+        """Refresh the identity cache from a tg_users row that was just read or written."""
+        cached = CachedUser(row_id=int(user.id), profile={column: getattr(user, column) for column in USER_PROFILE_COLUMNS})
+        if user.tg_id is not None:
+            identity_cache.put("tg", user.tg_id, cached)
+        if user.max_id is not None:
+            identity_cache.put("max", user.max_id, cached)
+        return cached
 
     @classmethod
     async def _resolve_external_ids_by_user_row(
@@ -69,101 +130,122 @@ class DBController:
         return {int(row[0]): int(row[1]) for row in rows if row[1] is not None}
     @staticmethod
     def get_effective_month_day(year: int, month: int, day: int) -> int:
-        _, num_days = monthrange(year, month)
-        return day if day <= num_days else num_days
+        return effective_month_day(year, month, day)
 
     @staticmethod
     async def save_update_user(tg_user: TgUser, from_contact: bool = False, current_user: int | None = None) -> None | TgUser:
         logger.info(f"db_controller save: {tg_user}")
-        async with AsyncSessionLocal() as session:
-            query = select(DB_User).where(DB_User.tg_id == tg_user.tg_id)
-            result = (await session.execute(query)).scalar_one_or_none()
-
-            if not result:
-                tg_user_dict = tg_user.model_dump(exclude={"title"}, exclude_defaults=True, exclude_unset=True)
-                user = DB_User(**tg_user_dict)
-                user.is_active = False if from_contact else True
-                session.add(user)
-            else:
-                tg_user_dict = tg_user.model_dump(exclude={"title"}, exclude_defaults=True, exclude_unset=True)
-                if tg_user_dict.get("language_code") is None:
-                    tg_user_dict.pop("language_code", None)
-                if from_contact:
-                    tg_user_dict.pop("is_active", None)
-                else:
-                    tg_user_dict["is_active"] = True
-                update_query = update(DB_User).where(DB_User.tg_id == tg_user.tg_id).values(**tg_user_dict).returning(DB_User)
-                user = (await session.execute(update_query)).scalar_one_or_none()
+        return await DBController._save_profile(tg_user, "tg", from_contact, current_user)
+
+    @staticmethod
+    async def save_update_max_user(max_user: MaxUser, from_contact: bool = False, current_user: int | None = None) -> None | MaxUser:
+        logger.info(f"db_controller save max: {max_user}")
+        return await DBController._save_profile(max_user, "max", from_contact, current_user)
 
+    @staticmethod
+    def _profile_entity(platform: str, external_id: int, profile: dict) -> TgUser | MaxUser:
+        data = {**profile, "id": external_id, "time_zone": profile.get("time_zone") or config.DEFAULT_TIMEZONE_NAME}
+        return MaxUser.model_validate(data) if platform == "max" else TgUser.model_validate(data)
+
+    @classmethod
+    async def _save_profile(
+        cls,
+        entity: TgUser | MaxUser,
+        platform: str,
+        from_contact: bool,
+        current_user: int | None,
+    ) -> None | TgUser | MaxUser:
+        """Create or update the tg_users row of a bot user.
+
+        The fields are compared with the row bound for the current update first (read from the database when the update
+        arrived), an unchanged profile costs no query at all. The LRU snapshot is not trusted here: it can be up to
+        USER_CACHE_TTL_SECONDS old and miss a delivery failure counted by a reminder worker.
+        Otherwise the row is written with one INSERT ... ON CONFLICT DO UPDATE. A user writing to the bot is active
+        again and their delivery failures start over; contacts keep their is_active flag.
+        """
+        user_col = cls._user_id_column(platform)
+        external_id = int(getattr(entity, user_col.key))
+        values = entity.model_dump(exclude={"title", "is_active", user_col.key}, exclude_defaults=True, exclude_unset=True)
+        if not from_contact:
+            values["is_active"] = True
+            values[f"{platform}_delivery_failures"] = 0
+
+        cached = request_user(platform, external_id)
+        if (
+            cached is not None
+            and not (from_contact and current_user)
+            and all(column in cached.profile for column in USER_PROFILE_COLUMNS)
+            and all(cached.profile[column] == value for column, value in values.items())
+        ):
+            return cls._profile_entity(platform, external_id, cached.profile)
+
+        async with AsyncSessionLocal() as session:
+            insert_fn = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+            query = insert_fn(DB_User).values({**values, user_col.key: external_id, "is_active": not from_contact})
+            query = query.on_conflict_do_update(index_elements=[user_col], set_={**values, "updated_at": func.now()}).returning(
+                *cls._user_snapshot_columns()
+            )
+            user = (await session.execute(query)).one()
             await session.commit()
-            await session.refresh(user)
+            cached = cls._cache_user(user)
 
             if from_contact and current_user:
-                current_user_query = select(DB_User).where(DB_User.tg_id == current_user)
-                current_user = (await session.execute(current_user_query)).scalar_one_or_none()
-
-                new_user_relation = UserRelation(
-                    user_id=current_user.id,
-                    related_user_id=user.id,
-                )
-                session.add(new_user_relation)
+                current_row_id = await cls._resolve_user_row_id_by_external(current_user, platform, session)
+                session.add(UserRelation(user_id=current_row_id, related_user_id=user.id))
 
                 try:
                     await session.commit()
                 except IntegrityError:
                     return None
 
-        user.id = user.tg_id
-        user.time_zone = config.DEFAULT_TIMEZONE_NAME if not user.time_zone else user.time_zone
-        return TgUser.model_validate(user)
+        return cls._profile_entity(platform, external_id, cached.profile)
 
     @staticmethod
-    async def save_update_max_user(max_user: MaxUser, from_contact: bool = False, current_user: int | None = None) -> None | MaxUser:
-        logger.info(f"db_controller save max: {max_user}")
-        async with AsyncSessionLocal() as session:
-            query = select(DB_User).where(DB_User.max_id == max_user.max_id)
-            result = (await session.execute(query)).scalar_one_or_none()
-
-            if not result:
-                max_user_dict = max_user.model_dump(exclude={"title"}, exclude_defaults=True, exclude_unset=True)
-                user = DB_User(**max_user_dict)
-                user.is_active = False if from_contact else True
-                session.add(user)
-            else:
-                max_user_dict = max_user.model_dump(exclude={"title"}, exclude_defaults=True, exclude_unset=True)
-                if max_user_dict.get("language_code") is None:
-                    max_user_dict.pop("language_code", None)
-                if from_contact:
-                    max_user_dict.pop("is_active", None)
-                else:
-                    max_user_dict["is_active"] = True
-                update_query = update(DB_User).where(DB_User.max_id == max_user.max_id).values(**max_user_dict).returning(DB_User)
-                user = (await session.execute(update_query)).scalar_one_or_none()
-
-            await session.commit()
-            await session.refresh(user)
+    def _user_snapshot_columns() -> tuple:
+        return (DB_User.id, DB_User.tg_id, DB_User.max_id, *(getattr(DB_User, column) for column in USER_PROFILE_COLUMNS))
 
-            if from_contact and current_user:
-                current_user_query = select(DB_User).where(DB_User.max_id == current_user)
-                current_user = (await session.execute(current_user_query)).scalar_one_or_none()
-
-                new_user_relation = UserRelation(
-                    user_id=current_user.id,
-                    related_user_id=user.id,
-                )
-                session.add(new_user_relation)
+    @staticmethod
+    async def load_request_user(external_id: int, platform: str | None = None) -> CachedUser | None:
+        """Read the row of the user behind an incoming update for bind_request_user, None for unknown users."""
+        user_col = DBController._user_id_column(platform)
+        async with AsyncSessionLocal() as session:
+            query = select(*DBController._user_snapshot_columns()).where(user_col == int(external_id))
+            user = (await session.execute(query)).one_or_none()
+        return DBController._cache_user(user) if user is not None else None
 
-                try:
-                    await session.commit()
-                except IntegrityError:
-                    return None
+    @staticmethod
+    async def get_events_version(external_id: int, platform: str | None = None) -> int:
+        """Counter bumped by every write to the user's events, free while the user's update is being handled."""
+        bound = request_user(DBController._normalize_platform(platform), external_id)
+        if bound is None or "events_version" not in bound.profile:
+            bound = await DBController.load_request_user(external_id, platform)
+        return int(bound.profile["events_version"]) if bound is not None else 0
 
-        user.id = user.max_id
-        user.time_zone = config.DEFAULT_TIMEZONE_NAME if not user.time_zone else user.time_zone
-        return MaxUser.model_validate(user)
+    @staticmethod
+    async def _bump_events_version(owners, session: AsyncSession) -> None:
+        """Bump events_version of the owners (row ids or a select of them) in the caller's transaction.
+
+        The new snapshots go straight to the identity cache, so renders later in the same update use the new version.
+        """
+        if isinstance(owners, list):
+            owners = [int(owner) for owner in owners if owner is not None]
+            if not owners:
+                return
+        query = (
+            update(DB_User)
+            .where(DB_User.id.in_(owners))
+            .values(events_version=DB_User.events_version + 1)
+            .returning(*DBController._user_snapshot_columns())
+        )
+        for user in (await session.execute(query)).all():
+            DBController._cache_user(user)
 
     @staticmethod
     async def get_user(tg_id: int, platform: str | None = None) -> TgUser | MaxUser | None:
+        bound = request_user(DBController._normalize_platform(platform), tg_id)
+        if bound is not None:
+            return DBController._profile_entity(platform, int(tg_id), bound.profile)
+
         user_col = DBController._user_id_column(platform)
         user_attr = user_col.key
         async with AsyncSessionLocal() as session:
@@ -179,9 +261,8 @@ class DBController:
 
     @staticmethod
     async def get_user_row_id(external_id: int, platform: str | None = None) -> int | None:
-        user_col = DBController._user_id_column(platform)
         async with AsyncSessionLocal() as session:
-            user = (await session.execute(select(DB_User.id).where(user_col == external_id))).scalar_one_or_none()
+            user = await DBController._resolve_user_row_id_by_external(external_id, platform, session)
             return int(user) if user is not None else None
 
     @staticmethod
@@ -195,6 +276,15 @@ class DBController:
                 user_kwargs = {user_col.key: user_id, "language_code": language_code}
                 session.add(DB_User(**user_kwargs))
             await session.commit()
+        identity_cache.invalidate(DBController._normalize_platform(platform), user_id)
+
+    @staticmethod
+    async def set_digest_time(user_id: int, digest_time: time | None, platform: str | None = None) -> None:
+        """Local time of the daily agenda message, None switches it off."""
+        user_col = DBController._user_id_column(platform)
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(DB_User).where(user_col == user_id).values(digest_time=digest_time))
+            await session.commit()
 
     @staticmethod
     async def get_max_user(max_id: int) -> MaxUser | None:
@@ -280,6 +370,9 @@ class DBController:
                     update(DbNote).where(DbNote.user_id == secondary.id).values(user_id=primary.id)
                 )
                 await session.execute(update(DbEvent).where(DbEvent.user_id == secondary.id).values(user_id=primary.id))
+                await session.execute(
+                    update(ReminderQueue).where(ReminderQueue.user_id == secondary.id).values(user_id=primary.id)
+                )
                 await session.execute(
                     update(DbEvent).where(DbEvent.creator_user_id == secondary.id).values(creator_user_id=primary.id)
                 )
@@ -355,8 +448,12 @@ class DBController:
                     )
                     .values(participant_user_id=primary_user.id)
                 )
+                await DBController._bump_events_version([primary_user.id], session)
             await session.commit()
 
+        # The two ids may now point at the merged row, the other one was deleted.
+        identity_cache.invalidate("tg", tg_id)
+        identity_cache.invalidate("max", max_id)
         return True, "Связь подтверждена."
 
     @staticmethod
@@ -621,8 +718,8 @@ class DBController:
                 stop_at=stop_datetime_tz,
             )
             session.add(new_event)
-            await session.commit()
-            await session.refresh(new_event)
+            # The event, its reminder_queue rows and the owner's events_version are committed together.
+            await session.flush()
 
             if new_event.max_id and (new_event.tg_id is None or new_event.creator_tg_id is None):
                 user = (await session.execute(select(DB_User).where(DB_User.max_id == new_event.max_id))).scalar_one_or_none()
@@ -635,7 +732,6 @@ class DBController:
                             creator_tg_id=new_event.creator_tg_id or user.tg_id,
                         )
                     )
-                    await session.commit()
                     await session.refresh(new_event)
             if new_event.tg_id and (new_event.max_id is None or new_event.creator_max_id is None):
                 user = (await session.execute(select(DB_User).where(DB_User.tg_id == new_event.tg_id))).scalar_one_or_none()
@@ -648,16 +744,18 @@ class DBController:
                             creator_max_id=new_event.creator_max_id or user.max_id,
                         )
                     )
-                    await session.commit()
                     await session.refresh(new_event)
 
+            await DBController._requeue_events([new_event.id], session)
+            await DBController._bump_events_version([new_event.user_id], session)
+            await session.commit()
             return new_event.id
 
     @staticmethod
     async def get_event_by_id(event_id: int, tz_name: str = config.DEFAULT_TIMEZONE_NAME) -> Event | None:
         user_tz = ZoneInfo(tz_name)
         async with AsyncSessionLocal() as session:
-            query = select(DbEvent).where(DbEvent.id == int(event_id))
+            query = select(DbEvent).options(raiseload("*")).where(DbEvent.id == int(event_id))
             db_event = (await session.execute(query)).scalar_one_or_none()
             if not db_event:
                 return None
@@ -671,16 +769,7 @@ class DBController:
         start_local = db_event.start_at.astimezone(user_tz)
         stop_local_time = db_event.stop_at.astimezone(user_tz).time() if db_event.stop_at else None
 
-        if db_event.daily:
-            recurrent = Recurrent.daily
-        elif db_event.weekly is not None:
-            recurrent = Recurrent.weekly
-        elif db_event.monthly is not None:
-            recurrent = Recurrent.monthly
-        elif db_event.annual_day is not None:
-            recurrent = Recurrent.annual
-        else:
-            recurrent = Recurrent.never
+        recurrent = DBController._recurrent(db_event)
 
         owner_tg_id = db_event.tg_id or (owner_user.tg_id if owner_user else None)
         owner_max_id = db_event.max_id or (owner_user.max_id if owner_user else None)
@@ -726,6 +815,9 @@ class DBController:
         async with AsyncSessionLocal() as session:
             update_query = update(DbEvent).where(DbEvent.id == int(event_id)).values(**values).returning(DbEvent.id)
             updated_id = (await session.execute(update_query)).scalar_one_or_none()
+            if updated_id is not None:
+                await DBController._requeue_events([updated_id], session)
+                await DBController._bump_events_version(select(DbEvent.user_id).where(DbEvent.id == updated_id), session)
             await session.commit()
             return updated_id
 
@@ -734,6 +826,44 @@ class DBController:
         _, num_days = monthrange(year, month)
         return [day for day in range(1, num_days + 1) if date(year, month, day).weekday() == weekday]
 
+    @staticmethod
+    def _month_counts_query(filters: list, year: int, month: int, tz_name: str):
+        """Postgres: {day: count} of the month straight from SQL, the same rules as expand_occurrences.
+
+        Every local day of the month comes from generate_series, events are matched against it by their local start
+        and cancellations are anti-joined, so no DbEvent rows or their relationships are loaded.
+        """
+        _, num_days = monthrange(year, month)
+        days = (
+            func.generate_series(datetime(year, month, 1), datetime(year, month, num_days), timedelta(days=1))
+            .table_valued("day", joins_implicitly=True)
+            .render_derived(name="days")
+        )
+        local_day = cast(days.c.day, Date)
+        day_number = extract("day", days.c.day)
+        local_start = func.timezone(tz_name, DbEvent.start_at)
+        start_day = cast(local_start, Date)
+
+        recurs = or_(
+            and_(DbEvent.single_event.is_(True), start_day == local_day),
+            DbEvent.daily.is_(True),
+            and_(DbEvent.weekly.is_not(None), extract("isodow", local_start) == extract("isodow", days.c.day)),
+            and_(DbEvent.monthly.is_not(None), func.least(extract("day", local_start), num_days) == day_number),
+            and_(
+                DbEvent.annual_day.is_not(None),
+                extract("month", local_start) == month,
+                extract("day", local_start) == day_number,
+            ),
+        )
+        canceled = select(CanceledEvent.id).where(CanceledEvent.event_id == DbEvent.id, CanceledEvent.cancel_date == local_day).exists()
+        return (
+            select(day_number, func.count())
+            .select_from(DbEvent)
+            .join(days, start_day <= local_day)
+            .where(*filters, recurs, ~canceled)
+            .group_by(day_number)
+        )
+
     async def get_current_month_events_by_user(
         self, user_id: int, month: int, year: int, tz_name: str = config.DEFAULT_TIMEZONE_NAME, platform: str | None = None
     ) -> dict[int, int]:
@@ -742,98 +872,187 @@ class DBController:
         user_tz = ZoneInfo(tz_name)
 
         month_start_local = datetime(year, month, 1, 0, 0, 0, tzinfo=user_tz)
-        month_end_local = datetime(year, month, num_days, 23, 59, 59, tzinfo=user_tz)
+        month_end_local = datetime.combine(date(year, month, num_days) + timedelta(days=1), time(), tzinfo=user_tz)
 
         # Переводим границы в UTC
         month_start_utc = month_start_local.astimezone(timezone.utc)
         month_end_utc = month_end_local.astimezone(timezone.utc)
 
+        event_dict = {day: 0 for day in range(1, num_days + 1)}
         event_user_col = self._event_user_column(platform)
         async with AsyncSessionLocal() as session:
             user_row_id = await self._resolve_user_row_id_by_external(user_id, platform, session)
             if user_row_id is None:
-                empty = {day: 0 for day in range(1, num_days + 1)}
-                empty[0] = []
-                return empty
-            query = select(DbEvent).where(
-                event_user_col == user_row_id,
-                DbEvent.start_at <= month_end_utc,
-                or_(
-                    and_(
-                        DbEvent.single_event.is_(True),
-                        DbEvent.start_at >= month_start_utc,
-                    ),
-                    and_(
-                        or_(
-                            DbEvent.daily.is_(True),
-                            DbEvent.weekly.is_not(None),
-                            DbEvent.monthly.is_not(None),
-                            and_(DbEvent.annual_month.is_not(None), DbEvent.annual_month.in_([month_start_utc.month, month_end_utc.month])),
-                        ),
-                    ),
-                ),
-            )
+                return event_dict
+            filters = [event_user_col == user_row_id, *self._window_filters(month_start_utc, month_end_utc)]
 
-            events = (await session.execute(query)).scalars().all()
+            if session.bind.dialect.name == "postgresql":
+                rows = (await session.execute(self._month_counts_query(filters, year, month, tz_name))).all()
+                event_dict.update({int(day): int(count) for day, count in rows})
+                return event_dict
 
-        event_dict: dict[int, int | list] = {day: 0 for day in range(1, num_days + 1)}
-        event_dict[0] = []  # для daily
+            events = (await session.execute(select(*EVENT_OCCURRENCE_COLUMNS).where(*filters))).all()
+            cancellations = await self._load_cancellations(
+                [event.id for event in events], month_start_local.date(), month_end_local.date(), session
+            )
 
-        def is_canceled(ev: DbEvent, d: date) -> bool:
-            return d in {_ev.cancel_date for _ev in ev.canceled_events}
+        for _, occurrence in expand_occurrences(events, month_start_local, month_end_local, user_tz, cancellations):
+            event_dict[occurrence.day] += 1
 
-        for event in events:
-            # Локальное время начала события
-            start_local_dt = event.start_at.astimezone(user_tz)
-            end_local_time = event.stop_at.astimezone(user_tz).time() if event.stop_at else None  # noqa
+        return event_dict
 
-            # SINGLE EVENT
-            if event.single_event:
-                event_dict[start_local_dt.day] += 1
+    @staticmethod
+    def _window_filters(start_utc: datetime, end_utc: datetime) -> list:
+        """Events that can occur in [start_utc, end_utc), annual ones are narrowed to the months the window touches."""
+        span = (end_utc.year - start_utc.year) * 12 + end_utc.month - start_utc.month
+        months = sorted({(start_utc.month - 1 + shift) % 12 + 1 for shift in range(min(span, 11) + 1)})
+        return [
+            DbEvent.start_at < end_utc,
+            or_(
+                and_(
+                    DbEvent.single_event.is_(True),
+                    DbEvent.start_at >= start_utc,
+                ),
+                and_(
+                    or_(
+                        DbEvent.daily.is_(True),
+                        DbEvent.weekly.is_not(None),
+                        DbEvent.monthly.is_not(None),
+                        and_(DbEvent.annual_month.is_not(None), DbEvent.annual_month.in_(months)),
+                    ),
+                ),
+            ),
+        ]
 
-            # DAILY EVENTS
-            elif event.daily:
-                event_dict[0].append(event)
+    @staticmethod
+    def _recurrent(event) -> Recurrent:
+        if event.daily:
+            return Recurrent.daily
+        if event.weekly is not None:
+            return Recurrent.weekly
+        if event.monthly is not None:
+            return Recurrent.monthly
+        if event.annual_day is not None:
+            return Recurrent.annual
+        return Recurrent.never
 
-            # MONTHLY EVENTS
-            elif event.monthly is not None:
-                day_in_month = self.get_effective_month_day(year, month, start_local_dt.day)
-                calculated_date = date(year, month, day_in_month)
-                if calculated_date >= start_local_dt.date() and not is_canceled(event, calculated_date):
-                    event_dict[day_in_month] += 1
+    @staticmethod
+    def _day_event(event, occurrence: datetime) -> DayEvent:
+        stop_time = DBController._as_utc(event.stop_at).astimezone(occurrence.tzinfo).time() if event.stop_at else None
+        return DayEvent(
+            day=occurrence.date(),
+            event_id=event.id,
+            description=event.description,
+            emoji=event.emoji,
+            start_time=occurrence.time(),
+            stop_time=stop_time,
+            recurrent=DBController._recurrent(event),
+        )
 
-            # ANNUAL EVENTS
-            elif event.annual_day is not None:
-                start_local = event.start_at.astimezone(user_tz)
+    @staticmethod
+    async def _window_occurrences(
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        user_tz: ZoneInfo,
+        platform: str | None = None,
+    ) -> list[tuple]:
+        """(event row, local occurrence) pairs of a user's events in [start, end), read with one query.
 
-                event_month = start_local.month
-                event_day = start_local.day
+        The window's cancellations are outer-joined to the events instead of being loaded by a second query.
+        """
+        async with AsyncSessionLocal() as session:
+            user_row_id = await DBController._resolve_user_row_id_by_external(user_id, platform, session)
+            if user_row_id is None:
+                return []
+            first, last = start.astimezone(user_tz).date(), end.astimezone(user_tz).date()
+            query = (
+                select(*EVENT_OCCURRENCE_COLUMNS, CanceledEvent.cancel_date)
+                .outerjoin(CanceledEvent, and_(CanceledEvent.event_id == DbEvent.id, CanceledEvent.cancel_date.between(first, last)))
+                .where(
+                    DBController._event_user_column(platform) == user_row_id,
+                    *DBController._window_filters(start.astimezone(timezone.utc), end.astimezone(timezone.utc)),
+                )
+                .order_by(DbEvent.start_time)
+            )
+            rows = (await session.execute(query)).all()
 
-                if event_month != month:
-                    continue
+        events = {}
+        cancellations: dict[int, set[date]] = {}
+        for row in rows:
+            events.setdefault(row.id, row)
+            if row.cancel_date is not None:
+                cancellations.setdefault(row.id, set()).add(row.cancel_date)
+        return list(expand_occurrences(events.values(), start, end, user_tz, cancellations))
 
-                calculated_date = date(year, month, event_day)
+    @staticmethod
+    async def get_users_day_events(user_ids: list[int], day: date, user_tz: ZoneInfo, session: AsyncSession) -> dict[int, list[DayEvent]]:
+        """{tg_users.id: DayEvent items ordered by time} of one local day for users sharing `user_tz`, read with one query.
 
-                if calculated_date >= start_local.date() and not is_canceled(event, calculated_date):
-                    event_dict[event_day] += 1
+        Occurrences follow the local calendar like the calendar views, cancellations are matched on local dates.
+        """
+        if not user_ids:
+            return {}
+        start = datetime.combine(day, time(), tzinfo=user_tz)
+        end = datetime.combine(day + timedelta(days=1), time(), tzinfo=user_tz)
+        window = DBController._window_filters(start.astimezone(timezone.utc), end.astimezone(timezone.utc))
+        filters = [DbEvent.user_id.in_(user_ids), *window]
+        rows = (await session.execute(select(*EVENT_OCCURRENCE_COLUMNS).where(*filters))).all()
+        cancellations = await DBController._load_cancellations(select(DbEvent.id).where(*filters), day, day, session)
+
+        events_by_user: dict[int, list[DayEvent]] = {}
+        for row, occurrence in sorted(expand_occurrences(rows, start, end, user_tz, cancellations), key=lambda item: (item[1], item[0].id)):
+            events_by_user.setdefault(row.user_id, []).append(DBController._day_event(row, occurrence))
+        return events_by_user
 
-            # WEEKLY EVENTS
-            elif event.weekly is not None:
-                weekday_user_tz = event.start_at.astimezone(user_tz).weekday()
-                weekdays = self.get_weekday_days_in_month(year=year, month=month, weekday=weekday_user_tz)
-                for day in weekdays:
-                    calculated_date_user_tz = date(year, month, day)
-                    if calculated_date_user_tz >= start_local_dt.date() and not is_canceled(event, calculated_date_user_tz):
-                        event_dict[day] += 1
+    @staticmethod
+    async def get_occurrences(
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        tz_name: str = config.DEFAULT_TIMEZONE_NAME,
+        mode: Literal["counts", "list"] = "list",
+        platform: str | None = None,
+    ) -> dict[date, int] | list[DayEvent]:
+        """Occurrences of a user's events in [start, end), any window length, one query.
 
-        for daily_event in event_dict[0]:
-            start_day = daily_event.start_at.astimezone(user_tz).date()
-            for day in range(1, num_days + 1):
-                calculated_date = date(year, month, day)
-                if start_day <= calculated_date and not is_canceled(daily_event, calculated_date):
-                    event_dict[day] += 1
+        mode="counts" gives {local date: number of occurrences} for every date the window touches,
+        mode="list" gives DayEvent items ordered by date and time.
+        """
+        user_tz = ZoneInfo(tz_name)
+        occurrences = await DBController._window_occurrences(user_id, start, end, user_tz, platform)
+        if mode == "counts":
+            first, last = start.astimezone(user_tz).date(), (end.astimezone(user_tz) - timedelta(microseconds=1)).date()
+            counts = {first + timedelta(days=shift): 0 for shift in range((last - first).days + 1)}
+            for _, occurrence in occurrences:
+                counts[occurrence.date()] += 1
+            return counts
+        occurrences.sort(key=lambda item: item[1])
+        return [DBController._day_event(event, occurrence) for event, occurrence in occurrences]
 
-        return event_dict
+    @staticmethod
+    async def get_day_view(
+        user_id: int,
+        year: int,
+        month: int,
+        day: int,
+        tz_name: str = config.DEFAULT_TIMEZONE_NAME,
+        platform: str | None = None,
+    ) -> DayView:
+        """Occurrences of a day and event counts of its week, read with one query."""
+        user_tz = ZoneInfo(tz_name)
+        selected = date(year, month, day)
+        week_start = selected - timedelta(days=selected.weekday())
+        start_local = datetime.combine(week_start, time(), tzinfo=user_tz)
+        end_local = datetime.combine(week_start + timedelta(days=7), time(), tzinfo=user_tz)
+        view = DayView(day=selected, week_counts={week_start + timedelta(days=shift): 0 for shift in range(7)})
+
+        for event, occurrence in await DBController._window_occurrences(user_id, start_local, end_local, user_tz, platform):
+            view.week_counts[occurrence.date()] += 1
+            if occurrence.date() == selected:
+                view.events.append(DBController._day_event(event, occurrence))
+        view.events.sort(key=lambda item: item.button_text())
+        return view
 
     @staticmethod
     async def get_current_day_events_by_user(
@@ -846,7 +1065,6 @@ class DBController:
         platform: str | None = None,
     ) -> str | list:
         user_tz = ZoneInfo(tz_name)
-        pickup_date_local = date(year, month, day)
         _, num_days = monthrange(year, month)
         add_days = 4 if day == num_days else 0
 
@@ -863,85 +1081,46 @@ class DBController:
             user_row_id = await DBController._resolve_user_row_id_by_external(user_id, platform, session)
             if user_row_id is None:
                 return [] if deleted else ""
-            query = select(DbEvent).where(
-                event_user_col == user_row_id,
-                DbEvent.start_at <= day_end_utc,
-                or_(
-                    and_(
-                        DbEvent.single_event.is_(True),
-                        DbEvent.start_at >= day_start_utc,
-                    ),
-                    DbEvent.daily.is_(True),
-                    and_(DbEvent.weekly.is_not(None), DbEvent.weekly.in_([day_start_utc.weekday(), day_end_utc.weekday()])),
-                    and_(
-                        DbEvent.monthly.is_not(None),
-                        or_(
-                            DbEvent.monthly.in_(range(day_start_for_monthly, day_end_utc.day + 1 + add_days)),
-                            DbEvent.monthly == day_start_utc.day,
+            query = (
+                select(*EVENT_OCCURRENCE_COLUMNS)
+                .where(
+                    event_user_col == user_row_id,
+                    DbEvent.start_at <= day_end_utc,
+                    or_(
+                        and_(
+                            DbEvent.single_event.is_(True),
+                            DbEvent.start_at >= day_start_utc,
+                        ),
+                        DbEvent.daily.is_(True),
+                        and_(DbEvent.weekly.is_not(None), DbEvent.weekly.in_([day_start_utc.weekday(), day_end_utc.weekday()])),
+                        and_(
+                            DbEvent.monthly.is_not(None),
+                            or_(
+                                DbEvent.monthly.in_(range(day_start_for_monthly, day_end_utc.day + 1 + add_days)),
+                                DbEvent.monthly == day_start_utc.day,
+                            ),
+                        ),
+                        and_(
+                            DbEvent.annual_day.is_not(None),
+                            DbEvent.annual_day.in_([day_start_utc.day, day_end_utc.day]),
+                            DbEvent.annual_month.in_([day_start_utc.month, day_end_utc.month]),
                         ),
                     ),
-                    and_(
-                        DbEvent.annual_day.is_not(None),
-                        DbEvent.annual_day.in_([day_start_utc.day, day_end_utc.day]),
-                        DbEvent.annual_month.in_([day_start_utc.month, day_end_utc.month]),
-                    ),
-                ),
+                )
             )
 
-            events = (await session.execute(query)).scalars().all()
-
-        event_list = []
-
-        def is_canceled(event: DbEvent) -> bool:
-            return pickup_date_local in {_ev.cancel_date for _ev in event.canceled_events}
-
-        for event in events:
-            if is_canceled(event):
-                continue
+            events = (await session.execute(query)).all()
+            day_start = day_start_local.date()
+            cancellations = await DBController._load_cancellations([event.id for event in events], day_start, day_start, session)
 
-            event_start_local_dt = event.start_at.astimezone(user_tz)
-
-            event_stop_local_time = None
-            if event.stop_at:
-                event_stop_local_time = event.stop_at.astimezone(user_tz).time()
-            emoji_prefix = f"{event.emoji} " if event.emoji else ""
-            time_range = (
-                f"{event_start_local_dt.time().strftime('%H:%M')}-{event_stop_local_time.strftime('%H:%M')}"
-                if event_stop_local_time
-                else f"{event_start_local_dt.time().strftime('%H:%M')}"
+        occurrences = expand_occurrences(events, day_start_local, day_start_local + timedelta(days=1), user_tz, cancellations)
+        day_events = [DBController._day_event(event, occurrence) for event, occurrence in occurrences]
+        if deleted:
+            event_list = sorted(
+                ((item.button_text(), item.event_id, item.recurrent == Recurrent.never) for item in day_events), key=lambda item: item[0]
             )
-
-            if event.daily:
-                recurrent = f"({Recurrent.daily.get_name().lower()})"
-            elif event.weekly is not None:
-                if event_start_local_dt.weekday() != day_start_local.weekday():
-                    continue
-                recurrent = f"({Recurrent.weekly.get_name().lower()})"
-            elif event.monthly is not None:
-                if event_start_local_dt.day not in range(day_start_local.day, day_start_local.day + 1 + add_days):
-                    continue
-                recurrent = f"({Recurrent.monthly.get_name().lower()})"
-            elif event.annual_day is not None:
-                if event_start_local_dt.day != day_start_local.day or event_start_local_dt.month != day_start_local.month:
-                    continue
-                recurrent = f"({Recurrent.annual.get_name().lower()})"
-            else:
-                recurrent = ""
-
-            if deleted:
-                event_list.append(
-                    (
-                        f"{emoji_prefix}{time_range}\n"
-                        f"{event.description[:20]}",
-                        event.id,
-                        event.single_event,
-                    )
-                )
-            else:
-                prefix = f"{emoji_prefix}{time_range} {recurrent}".strip()
-                event_list.append(f"{prefix} - {event.description}")
-
-        event_list.sort(key=lambda x: x[0] if isinstance(x, tuple) else x)
+        else:
+            event_list = sorted(item.line() for item in day_events)
 
         return event_list if deleted else "\n".join(event_list)
 
@@ -952,8 +1131,10 @@ class DBController:
             user_row_id = await DBController._resolve_user_row_id_by_external(user_id, platform, session)
             if user_row_id is None:
                 return
+            await session.execute(delete(ReminderQueue).where(ReminderQueue.user_id == user_row_id))
             query = delete(DbEvent).where(event_user_col == user_row_id)
             await session.execute(query)
+            await DBController._bump_events_version([user_row_id], session)
             await session.commit()
 
     @staticmethod
@@ -962,9 +1143,16 @@ class DBController:
         tz_name: str = config.DEFAULT_TIMEZONE_NAME,
     ) -> tuple:
         user_tz = ZoneInfo(tz_name)
-        query = delete(DbEvent).where(DbEvent.id == int(event_id)).returning(DbEvent)
+        query = (
+            delete(DbEvent)
+            .where(DbEvent.id == int(event_id))
+            .returning(DbEvent.single_event, DbEvent.start_at, DbEvent.description, DbEvent.user_id)
+        )
         async with AsyncSessionLocal() as session:
-            result = (await session.execute(query)).scalar_one_or_none()
+            await session.execute(delete(ReminderQueue).where(ReminderQueue.event_id == int(event_id)))
+            result = (await session.execute(query)).one_or_none()
+            if result is not None:
+                await DBController._bump_events_version([result.user_id], session)
             await session.commit()
 
             return result.single_event, f"{result.start_at.astimezone(user_tz).time().strftime('%H:%M')} {result.description}"
@@ -980,183 +1168,480 @@ class DBController:
         start_local = datetime.now(user_tz)
         stop_local = start_local + timedelta(days=NEAREST_EVENTS_DAYS)
 
-        start_dt_utc = start_local.astimezone(timezone.utc)
-        stop_dt_utc = stop_local.astimezone(timezone.utc)
+        occurrences = await self._window_occurrences(user_id, start_local, stop_local, user_tz, platform)
+        occurrences.sort(key=lambda item: item[1])
+        return [{occurrence: (event.description, event.emoji)} for event, occurrence in occurrences]
 
-        event_user_col = self._event_user_column(platform)
+    @staticmethod
+    async def create_cancel_event(event_id: int, cancel_date: date) -> None:
+        new_cancel_event = CanceledEvent(cancel_date=cancel_date, event_id=int(event_id))
         async with AsyncSessionLocal() as session:
-            user_row_id = await self._resolve_user_row_id_by_external(user_id, platform, session)
-            if user_row_id is None:
-                return []
-            query = (
-                select(DbEvent)
-                .where(
-                    event_user_col == user_row_id,
-                    DbEvent.start_at <= stop_dt_utc,
-                    or_(
-                        and_(DbEvent.single_event.is_(True), DbEvent.start_at.between(start_dt_utc, stop_dt_utc)),
-                        DbEvent.daily.is_(True),  # Все ежедневные события
-                        DbEvent.weekly.is_not(None),  # Все еженедельные события ТК у нас 10 дней, то любое недельное событие попадает
-                        and_(
-                            DbEvent.monthly.is_not(None),  # Все ежемесячные события, если совпал день
-                            DbEvent.monthly.between(start_dt_utc.day, stop_dt_utc.day),
-                        ),
-                        and_(
-                            DbEvent.annual_day.between(start_dt_utc.day, stop_dt_utc.day),
-                            DbEvent.annual_month.in_([start_dt_utc.month, stop_dt_utc.month]),
-                        ),
-                    ),
-                )
-                .order_by(DbEvent.start_time)
-            )
+            session.add(new_cancel_event)
+            await session.flush()
+            await DBController._requeue_events([int(event_id)], session)
+            await DBController._bump_events_version(select(DbEvent.user_id).where(DbEvent.id == int(event_id)), session)
+            await session.commit()
 
-            result = (await session.execute(query)).scalars().all()
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _zone(tz_name: str | None) -> ZoneInfo:
+        return ZoneInfo(tz_name or config.DEFAULT_TIMEZONE_NAME)
 
-            event_list = []
+    @staticmethod
+    def _reminder_owner_columns() -> tuple:
+        # A platform id is hidden once reminders to it keep failing (bot blocked, chat deleted).
+        limit = config.REMINDER_FAILURE_LIMIT
+        return (
+            case((DB_User.tg_delivery_failures < limit, DB_User.tg_id), else_=None).label("tg_id"),
+            case((DB_User.max_delivery_failures < limit, DB_User.max_id), else_=None).label("max_id"),
+            DB_User.language_code,
+            DB_User.time_zone,
+        )
 
-            for event in result:
-                _event_start_at_user_tz = event.start_at.astimezone(user_tz)
+    @staticmethod
+    def _reachable_owner_clause():
+        limit = config.REMINDER_FAILURE_LIMIT
+        return or_(
+            and_(DB_User.tg_id.is_not(None), DB_User.tg_delivery_failures < limit),
+            and_(DB_User.max_id.is_not(None), DB_User.max_delivery_failures < limit),
+        )
 
-                if event.single_event is True:
-                    event_list.append({_event_start_at_user_tz: (event.description, event.emoji)})
+    @staticmethod
+    async def record_delivery_failures(external_ids: list[int], platform: str | None = None) -> None:
+        """Count a failed reminder for every recipient; reset by a delivered message or when the user writes to the bot."""
+        if not external_ids:
+            return
+        user_col = DBController._user_id_column(platform)
+        counter = DB_User.max_delivery_failures if DBController._normalize_platform(platform) == "max" else DB_User.tg_delivery_failures
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(DB_User).where(user_col.in_(external_ids)).values({counter: counter + 1}))
+            await session.commit()
+        for external_id in external_ids:
+            identity_cache.invalidate(DBController._normalize_platform(platform), external_id)
 
-                elif event.daily is True:
-                    for _date in range(0, NEAREST_EVENTS_DAYS):
-                        _calculated_date = start_local + timedelta(days=_date)
-                        if _calculated_date.date() in [_ev.cancel_date for _ev in event.canceled_events]:
-                            continue
-                        _combined = datetime.combine(_calculated_date.date(), _event_start_at_user_tz.time(), tzinfo=user_tz)
-                        event_list.append({_combined: (event.description, event.emoji)})
+    @staticmethod
+    async def reset_delivery_failures(external_ids: list[int], platform: str | None = None) -> None:
+        """Start the consecutive failure count over for recipients a message reached; rows already at 0 are not written."""
+        if not external_ids:
+            return
+        user_col = DBController._user_id_column(platform)
+        counter = DB_User.max_delivery_failures if DBController._normalize_platform(platform) == "max" else DB_User.tg_delivery_failures
+        async with AsyncSessionLocal() as session:
+            query = update(DB_User).where(user_col.in_(external_ids), counter > 0).values({counter: 0}).returning(user_col)
+            reset = (await session.execute(query)).scalars().all()
+            await session.commit()
+        for external_id in reset:
+            identity_cache.invalidate(DBController._normalize_platform(platform), external_id)
 
-                elif event.monthly is not None:
-                    for _date in range(0, NEAREST_EVENTS_DAYS):
-                        _calculated_date = start_local + timedelta(days=_date)
-                        if _calculated_date.date() in [_ev.cancel_date for _ev in event.canceled_events]:
-                            continue
+    @staticmethod
+    def _reminder_row(row, event_dt: datetime) -> dict:
+        # `row` projects the event columns next to the owner columns, so delivery needs no per-reminder user lookup.
+        user_tz = DBController._zone(row.time_zone)
+        return {
+            "event_id": row.id,
+            "user_id": row.user_id,
+            "event_dt": event_dt,
+            "tg_id": row.tg_id,
+            "max_id": row.max_id,
+            "language_code": row.language_code,
+            "time_zone": row.time_zone,
+            "start_time": event_dt.astimezone(user_tz).time(),
+            "description": row.description,
+        }
 
-                        effective_day = self.get_effective_month_day(
-                            _calculated_date.year, _calculated_date.month, _event_start_at_user_tz.day
-                        )
-                        if _calculated_date.day == effective_day:
-                            _combined = datetime.combine(_calculated_date.date(), _event_start_at_user_tz.time(), tzinfo=user_tz)
-                            event_list.append({_combined: (event.description, event.emoji)})
-
-                elif event.annual_day is not None:
-                    for _date in range(0, NEAREST_EVENTS_DAYS):
-                        _calculated_date = start_local + timedelta(days=_date)
-                        if _calculated_date.date() in [_ev.cancel_date for _ev in event.canceled_events]:
-                            continue
-                        if _event_start_at_user_tz.day == _calculated_date.day and _event_start_at_user_tz.month == _calculated_date.month:
-                            _combined = datetime.combine(_calculated_date.date(), _event_start_at_user_tz.time(), tzinfo=user_tz)
-                            event_list.append({_combined: (event.description, event.emoji)})
-                            break
-
-                elif event.weekly is not None:
-                    for _date in range(0, NEAREST_EVENTS_DAYS):
-                        _calculated_date = start_local + timedelta(days=_date)
-                        if _calculated_date.date() in [_ev.cancel_date for _ev in event.canceled_events]:
-                            continue
-                        if _event_start_at_user_tz.weekday() == _calculated_date.weekday() and _event_start_at_user_tz < _calculated_date:
-                            _combined = datetime.combine(_calculated_date.date(), _event_start_at_user_tz.time(), tzinfo=user_tz)
-                            event_list.append({_combined: (event.description, event.emoji)})
-
-            if event_list:
-                event_list = sorted(event_list, key=lambda d: list(d.keys())[0])
-            return event_list
+    @staticmethod
+    async def _load_cancellations(event_ids, first: date, last: date, session: AsyncSession) -> dict[int, set[date]]:
+        """{event_id: cancel dates} inside [first, last], read with one bounded query.
+
+        `event_ids` is a list or a select of ids; events without cancellations in the window are absent.
+        """
+        cancellations: dict[int, set[date]] = {}
+        if isinstance(event_ids, list) and not event_ids:
+            return cancellations
+        query = select(CanceledEvent.event_id, CanceledEvent.cancel_date).where(
+            CanceledEvent.event_id.in_(event_ids),
+            CanceledEvent.cancel_date.between(first, last),
+        )
+        for event_id, cancel_date in (await session.execute(query)).all():
+            cancellations.setdefault(event_id, set()).add(cancel_date)
+        return cancellations
 
     @staticmethod
-    async def create_cancel_event(event_id: int, cancel_date: date) -> None:
-        new_cancel_event = CanceledEvent(cancel_date=cancel_date, event_id=int(event_id))
-        async with AsyncSessionLocal() as session:
-            session.add(new_cancel_event)
-            await session.commit()
+    async def _expand_reminder_rows(rows: list, start_dt: datetime, end_dt: datetime, session: AsyncSession, event_ids=None) -> list[dict]:
+        # Occurrences follow each owner's wall clock like the calendar does, cancel dates are local to each owner.
+        if not rows:
+            return []
+        if event_ids is None:
+            event_ids = [row.id for row in rows]
+        first, last = start_dt.date() - timedelta(days=1), end_dt.date() + timedelta(days=1)
+        cancellations = await DBController._load_cancellations(event_ids, first, last, session)
+        occurrences = expand_occurrences_batch(rows, start_dt, end_dt, cancellations, lambda row: DBController._zone(row.time_zone))
+        return [DBController._reminder_row(row, event_dt) for row, event_dt in occurrences]
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    @staticmethod
+    def _start_time_window_clause(start_dt: datetime, end_dt: datetime):
+        # start_time is the UTC time of the first occurrence; recurring ones keep their local time, so after a daylight
+        # saving change they fire up to REMINDER_DST_SLACK away from it. The exact times come from the expansion.
+        start_dt, end_dt = start_dt - REMINDER_DST_SLACK, end_dt + REMINDER_DST_SLACK
+        if end_dt - start_dt >= timedelta(days=1):
+            return None
+        if start_dt.date() == end_dt.date():
+            return and_(DbEvent.start_time >= start_dt.time(), DbEvent.start_time < end_dt.time())
+        return or_(DbEvent.start_time >= start_dt.time(), DbEvent.start_time < end_dt.time())
 
     @staticmethod
-    async def get_current_day_events_all_users(
-        event_dt: datetime,
+    async def get_events_all_users_in_range(
+        start_dt: datetime,
+        end_dt: datetime,
         session: AsyncSession,
-        limit: int = 400,
-        offset: int = 0,
-        platform: str | None = None,
+        event_ids: list[int] | None = None,
+        shard: tuple[int, int] | None = None,
+        user_ids: list[int] | None = None,
     ) -> list:
-        last_day = monthrange(event_dt.year, event_dt.month)[1]
-        monthly_clause = DbEvent.monthly == event_dt.day
-        if event_dt.day == last_day:
-            monthly_clause = or_(monthly_clause, DbEvent.monthly > last_day)
+        """Expand occurrences in [start_dt, end_dt) for every user, minute precision, UTC.
+
+        `shard` is (index, count): only owners with user_id % count == index are read.
+        """
+        start_dt = DBController._as_utc(start_dt).replace(second=0, microsecond=0)
+        end_dt = DBController._as_utc(end_dt).replace(second=0, microsecond=0)
+        if end_dt <= start_dt:
+            return []
+
+        filters = [
+            DbEvent.start_at < end_dt,
+            or_(
+                and_(DbEvent.single_event.is_(True), DbEvent.start_at >= start_dt),
+                DbEvent.daily.is_(True),
+                DbEvent.weekly.is_not(None),
+                DbEvent.monthly.is_not(None),
+                DbEvent.annual_day.is_not(None),
+            ),
+        ]
+        start_time_clause = DBController._start_time_window_clause(start_dt, end_dt)
+        if start_time_clause is not None:
+            filters.append(start_time_clause)
+        if event_ids is not None:
+            filters.append(DbEvent.id.in_(event_ids))
+        if shard is not None:
+            filters.append(DbEvent.user_id % shard[1] == shard[0])
+        if user_ids is not None:
+            filters.append(DbEvent.user_id.in_(user_ids))
 
-        logger.info(f"events for day from db: {event_dt}, week: {event_dt.weekday()}")
-        logger.info(f"INCOME DATETIME: {event_dt}")
+        query = (
+            select(*EVENT_OCCURRENCE_COLUMNS, *DBController._reminder_owner_columns())
+            .join(DB_User, DB_User.id == DbEvent.user_id)
+            .where(*filters, DBController._reachable_owner_clause())
+            .order_by(DbEvent.start_time, DbEvent.id)
+        )
+        rows = (await session.execute(query)).all()
 
-        event_user_col = DBController._event_user_column(platform)
+        # Range scans over every owner can hold more ids than a bind list allows, so cancellations filter by subquery.
+        event_ids = select(DbEvent.id).join(DB_User, DB_User.id == DbEvent.user_id).where(*filters, DBController._reachable_owner_clause())
+        event_list = await DBController._expand_reminder_rows(rows, start_dt, end_dt, session, event_ids)
+
+        event_list.sort(key=lambda item: (item["event_dt"], item["event_id"]))
+        return event_list
+
+    @staticmethod
+    async def _insert_queue_rows(occurrences: list[dict], session: AsyncSession) -> None:
+        # An event writer and a queue extension can both queue the same occurrence, the first row wins.
+        rows = [
+            {"fire_at": item["event_dt"], "event_id": item["event_id"], "user_id": item["user_id"]}
+            for item in occurrences
+            if item["user_id"] is not None
+        ]
+        insert_fn = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+        for offset in range(0, len(rows), 1000):
+            query = insert_fn(ReminderQueue).values(rows[offset : offset + 1000])
+            await session.execute(query.on_conflict_do_nothing(index_elements=["event_id", "fire_at"]))
+
+    @staticmethod
+    async def _requeue_events(event_ids: list[int], session: AsyncSession) -> None:
+        """Rebuild the upcoming reminder_queue rows of changed events.
+
+        Rows are written up to the materialized horizon or now + REMINDER_QUEUE_HOURS, whichever is later: an
+        extension running concurrently materializes its window from a snapshot that may not see this write,
+        so the writer covers that window itself.
+        """
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        await session.execute(delete(ReminderQueue).where(ReminderQueue.event_id.in_(event_ids), ReminderQueue.fire_at >= now))
+        query = select(ReminderCheckpoint.completed_at).where(ReminderCheckpoint.name == REMINDER_QUEUE_CHECKPOINT)
+        queued_until = (await session.execute(query)).scalar_one_or_none()
+        if queued_until is None:
+            return
+        end_dt = max(DBController._as_utc(queued_until), now + timedelta(hours=config.REMINDER_QUEUE_HOURS))
+        occurrences = await DBController.get_events_all_users_in_range(now, end_dt, session, event_ids=event_ids)
+        await DBController._insert_queue_rows(occurrences, session)
+
+    @staticmethod
+    async def extend_reminder_queue(
+        now: datetime,
+        horizon: timedelta = timedelta(hours=config.REMINDER_QUEUE_HOURS),
+        refill_before: timedelta = timedelta(hours=config.REMINDER_QUEUE_REFILL_HOURS),
+    ) -> int:
+        """Materialize occurrences up to now + horizon once less than refill_before is left in reminder_queue.
+
+        Returns the number of queued occurrences, 0 when the queue was still long enough.
+        """
+        now = DBController._as_utc(now).replace(second=0, microsecond=0)
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(ReminderCheckpoint, REMINDER_QUEUE_CHECKPOINT)
+            queued_until = DBController._as_utc(checkpoint.completed_at) if checkpoint else None
+            if queued_until is not None and queued_until >= now + refill_before:
+                return 0
+
+            start_dt = max(queued_until, now) if queued_until else now
+            end_dt = now + horizon
+            await session.execute(delete(ReminderQueue).where(ReminderQueue.fire_at >= start_dt, ReminderQueue.fire_at < end_dt))
+            occurrences = await DBController.get_events_all_users_in_range(start_dt, end_dt, session)
+            await DBController._insert_queue_rows(occurrences, session)
+            if checkpoint is None:
+                session.add(ReminderCheckpoint(name=REMINDER_QUEUE_CHECKPOINT, completed_at=end_dt))
+            else:
+                checkpoint.completed_at = end_dt
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another process materialized the same window first.
+                await session.rollback()
+                return 0
+
+        logger.info(f"reminder queue materialized [{start_dt}, {end_dt}): {len(occurrences)} occurrences")
+        return len(occurrences)
+
+    @staticmethod
+    async def _read_queue_page(
+        fire_filter,
+        session: AsyncSession,
+        limit: int,
+        after: tuple[datetime, int] | None,
+        shard: tuple[int, int] | None = None,
+    ) -> tuple[list[dict], tuple[datetime, int] | None]:
+        cursor_filters = [tuple_(ReminderQueue.fire_at, ReminderQueue.event_id) > tuple_(*after)] if after is not None else []
+        if shard is not None:
+            cursor_filters.append(ReminderQueue.user_id % shard[1] == shard[0])
         query = (
-            select(DbEvent)
-            .where(
-                DbEvent.start_at <= event_dt,
-                DbEvent.start_time == event_dt.time(),
-                or_(
-                    and_(DbEvent.single_event.is_(True), DbEvent.start_at == event_dt),
-                    DbEvent.daily.is_(True),  # Все ежедневные события
-                    DbEvent.weekly == event_dt.weekday(),  # Все еженедельные события
-                    monthly_clause,  # Все ежемесячные события, если совпал день
-                    and_(
-                        DbEvent.annual_day == event_dt.day,  # Все ежегодные, если совпал месяц и день
-                        DbEvent.annual_month == event_dt.month,
-                    ),
-                ),
-            )
-            .order_by(DbEvent.start_time)
+            select(ReminderQueue.fire_at, *EVENT_OCCURRENCE_COLUMNS, *DBController._reminder_owner_columns())
+            .join(DbEvent, DbEvent.id == ReminderQueue.event_id)
+            .join(DB_User, DB_User.id == ReminderQueue.user_id)
+            .where(*cursor_filters, fire_filter, DBController._reachable_owner_clause())
+            .order_by(ReminderQueue.fire_at, ReminderQueue.event_id)
             .limit(limit)
-            .offset(offset)
         )
+        rows = (await session.execute(query)).all()
+        next_cursor = (rows[-1].fire_at, rows[-1].id) if len(rows) == limit else None
+        if not rows:
+            return [], next_cursor
+
+        # The api/ service writes events and canceled_events without touching reminder_queue: a row only fires while
+        # its event still exists (inner join) and still has an uncancelled occurrence at fire_at on the owner's calendar.
+        fire_dates = [DBController._as_utc(row.fire_at).date() for row in rows]
+        first, last = min(fire_dates) - timedelta(days=1), max(fire_dates) + timedelta(days=1)
+        cancellations = await DBController._load_cancellations(sorted({row.id for row in rows}), first, last, session)
+        reminders = []
+        for row in rows:
+            fire_at = DBController._as_utc(row.fire_at)
+            occurrences = expand_occurrences_batch(
+                [row], fire_at, fire_at + timedelta(minutes=1), cancellations, lambda item: DBController._zone(item.time_zone)
+            )
+            if occurrences:
+                reminders.append(DBController._reminder_row(row, fire_at))
+        return reminders, next_cursor
 
-        event_list = []
-        # {"tg_id": "", "start_time": "", "description": ""}
+    @staticmethod
+    async def get_due_reminders(
+        now: datetime,
+        leads_minutes: tuple[int, ...],
+        session: AsyncSession,
+        limit: int = 400,
+        after: tuple[datetime, int] | None = None,
+        shard: tuple[int, int] | None = None,
+    ) -> tuple[list[tuple[int, dict]], tuple[datetime, int] | None]:
+        """One keyset page of (lead_minutes, occurrence) reminders due at `now` for every lead time, in one query.
+
+        `shard` is (index, count): only recipients with user_id % count == index are returned.
+        """
+        now = DBController._as_utc(now).replace(second=0, microsecond=0)
+        fire_times = [now + timedelta(minutes=lead) for lead in leads_minutes]
+        rows, next_cursor = await DBController._read_queue_page(ReminderQueue.fire_at.in_(fire_times), session, limit, after, shard)
+        return [(int((row["event_dt"] - now).total_seconds() // 60), row) for row in rows], next_cursor
+
+    @staticmethod
+    async def prune_reminder_queue(before: datetime) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(delete(ReminderQueue).where(ReminderQueue.fire_at < DBController._as_utc(before)))
+            await session.commit()
+            return result.rowcount or 0
 
-        result = (await session.execute(query)).scalars().all()
+    @staticmethod
+    async def get_digest_buckets(now: datetime, shard: tuple[int, int] | None = None) -> dict[str, list[dict]]:
+        """Users whose local digest_time is the current minute, grouped by time zone.
 
-        user_ids = [int(getattr(event, event_user_col.key)) for event in result if getattr(event, event_user_col.key) is not None]
-        user_col = DBController._user_id_column(platform)
-        users_query = select(DB_User).where(DB_User.id.in_(user_ids))
-        users = (await session.execute(users_query)).scalars().all()
-
-        users_dict: dict[int, timedelta] = {}
-        external_ids: dict[int, int] = {}
-
-        dt_aware_default = datetime.now(ZoneInfo(config.DEFAULT_TIMEZONE_NAME)).utcoffset()
-
-        for _user in users:
-            tz = ZoneInfo(_user.time_zone) if _user.time_zone else ZoneInfo(config.DEFAULT_TIMEZONE_NAME)
-            dt_aware = datetime.now(tz)
-            users_dict[int(_user.id)] = dt_aware.utcoffset()
-            external_id = getattr(_user, user_col.key)
-            if external_id is not None:
-                external_ids[int(_user.id)] = int(external_id)
-
-        for event in result:
-            if event_dt.date() in [_ev.cancel_date for _ev in event.canceled_events]:
-                continue
-            owner_row_id = getattr(event, event_user_col.key)
-            if owner_row_id is None:
-                continue
-            owner_external_id = external_ids.get(int(owner_row_id))
-            if owner_external_id is None:
-                continue
-
-            event_list.append(
-                {
-                    "event_id": event.id,
-                    "tg_id": owner_external_id,
-                    "start_time": (event.start_at + users_dict.get(int(owner_row_id), dt_aware_default)).time(),
-                    "description": event.description,
-                }
+        Local time is computed once per zone; all buckets are read with one query.
+        """
+        now = DBController._as_utc(now).replace(second=0, microsecond=0)
+        zone_col = func.coalesce(DB_User.time_zone, config.DEFAULT_TIMEZONE_NAME)
+        async with AsyncSessionLocal() as session:
+            zones = (await session.execute(select(zone_col).where(DB_User.digest_time.is_not(None)).distinct())).scalars().all()
+            if not zones:
+                return {}
+            local_times = {zone: now.astimezone(DBController._zone(zone)).time() for zone in zones}
+            filters = [
+                DB_User.digest_time.is_not(None),
+                or_(*(and_(zone_col == zone, DB_User.digest_time == local_time) for zone, local_time in local_times.items())),
+                DBController._reachable_owner_clause(),
+            ]
+            if shard is not None:
+                filters.append(DB_User.id % shard[1] == shard[0])
+            query = select(DB_User.id, zone_col.label("zone"), *DBController._reminder_owner_columns()).where(*filters)
+            rows = (await session.execute(query)).all()
+
+        buckets: dict[str, list[dict]] = {}
+        for row in rows:
+            buckets.setdefault(row.zone, []).append(
+                {"user_id": row.id, "tg_id": row.tg_id, "max_id": row.max_id, "language_code": row.language_code}
             )
+        return buckets
 
-        return event_list
+    @staticmethod
+    def _ledger_keys(keys) -> list[tuple[int, datetime, int]]:
+        return list(dict.fromkeys((int(event_id), DBController._as_utc(occurrence), int(lead)) for event_id, occurrence, lead in keys))
+
+    @staticmethod
+    def _ledger_key_clause(keys: list[tuple[int, datetime, int]]):
+        return tuple_(SentReminder.event_id, SentReminder.occurrence_utc, SentReminder.lead_minutes).in_(keys)
+
+    @staticmethod
+    async def claim_reminders(
+        keys: list[tuple[int, datetime, int]], reclaim_before: datetime | None = None
+    ) -> set[tuple[int, datetime, int]]:
+        """Claim (event_id, occurrence_utc, lead_minutes) in the ledger, return the keys that were not sent or claimed before.
+
+        Only the returned keys may be delivered; report the outcome with confirm_reminders or release_reminders.
+        Claims that were never confirmed and were taken before `reclaim_before` belong to a run that crashed,
+        they are taken over instead of being skipped.
+        """
+        keys = DBController._ledger_keys(keys)
+        if not keys:
+            return set()
+
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            insert_fn = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+            query = insert_fn(SentReminder).values(
+                [
+                    {"event_id": event_id, "occurrence_utc": occurrence, "lead_minutes": lead, "claimed_at": now, "sent_at": None}
+                    for event_id, occurrence, lead in keys
+                ]
+            )
+            index_elements = ["event_id", "occurrence_utc", "lead_minutes"]
+            if reclaim_before is None:
+                query = query.on_conflict_do_nothing(index_elements=index_elements)
+            else:
+                query = query.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={"claimed_at": now},
+                    where=and_(SentReminder.sent_at.is_(None), SentReminder.claimed_at < DBController._as_utc(reclaim_before)),
+                )
+            query = query.returning(SentReminder.event_id, SentReminder.occurrence_utc, SentReminder.lead_minutes)
+            rows = (await session.execute(query)).all()
+            await session.commit()
+
+        return {(row[0], DBController._as_utc(row[1]), row[2]) for row in rows}
+
+    @staticmethod
+    async def confirm_reminders(keys: list[tuple[int, datetime, int]]) -> None:
+        """Mark claimed ledger keys as sent."""
+        keys = DBController._ledger_keys(keys)
+        if not keys:
+            return
+        async with AsyncSessionLocal() as session:
+            for offset in range(0, len(keys), 500):
+                clause = DBController._ledger_key_clause(keys[offset : offset + 500])
+                await session.execute(update(SentReminder).where(clause, SentReminder.sent_at.is_(None)).values(sent_at=func.now()))
+            await session.commit()
+
+    @staticmethod
+    async def release_reminders(keys: list[tuple[int, datetime, int]]) -> None:
+        """Drop claims whose delivery failed, so a later replay of the minute can send them."""
+        keys = DBController._ledger_keys(keys)
+        if not keys:
+            return
+        async with AsyncSessionLocal() as session:
+            for offset in range(0, len(keys), 500):
+                clause = DBController._ledger_key_clause(keys[offset : offset + 500])
+                await session.execute(delete(SentReminder).where(clause, SentReminder.sent_at.is_(None)))
+            await session.commit()
+
+    @staticmethod
+    async def prune_sent_reminders(before: datetime) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(delete(SentReminder).where(SentReminder.occurrence_utc < DBController._as_utc(before)))
+            await session.commit()
+            return result.rowcount or 0
+
+    @staticmethod
+    async def claim_digests(user_ids: list[int], day: date) -> set[int]:
+        """Claim the `day` digest of tg_users ids in the sent_digests ledger, return the ids that did not get it before.
+
+        Only the returned users may be sent their digest; release_digests gives back the ones whose delivery failed.
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return set()
+        async with AsyncSessionLocal() as session:
+            insert_fn = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+            query = (
+                insert_fn(SentDigest)
+                .values([{"user_id": user_id, "digest_date": day} for user_id in user_ids])
+                .on_conflict_do_nothing(index_elements=["user_id", "digest_date"])
+                .returning(SentDigest.user_id)
+            )
+            claimed = set((await session.execute(query)).scalars().all())
+            await session.commit()
+        return claimed
+
+    @staticmethod
+    async def release_digests(user_ids: list[int], day: date) -> None:
+        """Drop digest claims whose delivery failed, so a later run of the same minute can send them."""
+        if not user_ids:
+            return
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(SentDigest).where(SentDigest.user_id.in_(user_ids), SentDigest.digest_date == day))
+            await session.commit()
+
+    @staticmethod
+    async def prune_sent_digests(before: date) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(delete(SentDigest).where(SentDigest.digest_date < before))
+            await session.commit()
+            return result.rowcount or 0
+
+    @staticmethod
+    async def get_reminder_checkpoint(name: str) -> datetime | None:
+        async with AsyncSessionLocal() as session:
+            query = select(ReminderCheckpoint.completed_at).where(ReminderCheckpoint.name == name)
+            value = (await session.execute(query)).scalar_one_or_none()
+        return DBController._as_utc(value) if value is not None else None
+
+    @staticmethod
+    async def set_reminder_checkpoint(name: str, completed_at: datetime) -> None:
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(ReminderCheckpoint, name)
+            if checkpoint is None:
+                session.add(ReminderCheckpoint(name=name, completed_at=completed_at))
+            else:
+                checkpoint.completed_at = completed_at
+            await session.commit()
 
     @staticmethod
     async def resave_event_to_participant(event_id: int, user_id: int, platform: str | None = None) -> int | None:
         async with AsyncSessionLocal() as session:
-            query = select(DbEvent).where(DbEvent.id == event_id)
+            query = select(DbEvent).options(raiseload("*")).where(DbEvent.id == event_id)
             event = (await session.execute(query)).scalar_one_or_none()
 
             if not event:
@@ -1195,15 +1680,17 @@ class DBController:
             )
 
             session.add(new_event)
-            await session.commit()
-            await session.refresh(new_event)
+            await session.flush()
 
+            await DBController._requeue_events([new_event.id], session)
+            await DBController._bump_events_version([participant_user_row], session)
+            await session.commit()
             return new_event.id
 
     @staticmethod
     async def reschedule_event(event_id: int, shift_hours: int = 0, shift_days: int = 0) -> int | None:
         async with AsyncSessionLocal() as session:
-            event = (await session.execute(select(DbEvent).where(DbEvent.id == int(event_id)))).scalar_one_or_none()
+            event = (await session.execute(select(DbEvent).options(raiseload("*")).where(DbEvent.id == int(event_id)))).scalar_one_or_none()
             if not event:
                 return None
 
@@ -1232,9 +1719,11 @@ class DBController:
             )
 
             session.add(new_event)
-            await session.commit()
-            await session.refresh(new_event)
+            await session.flush()
 
+            await DBController._requeue_events([new_event.id], session)
+            await DBController._bump_events_version([new_event.user_id], session)
+            await session.commit()
             return new_event.id
 
 
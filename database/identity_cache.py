@@ -0,0 +1,64 @@
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+from config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
+from database.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    row_id: int
+    profile: dict = field(default_factory=dict)  # tg_users columns as of the last read or write, may be partial
+
+
+# The tg_users row of the user whose update is being handled. The bot middleware binds it once per update, so every
+# lookup of that user during the update (locale, row id, profile sync) is answered without a query.
+_request_user: ContextVar[tuple[str, int, CachedUser] | None] = ContextVar("request_user", default=None)
+
+
+def bind_request_user(platform: str, external_id: int | None, user: CachedUser | None) -> Token:
+    return _request_user.set((platform, int(external_id), user) if user is not None and external_id is not None else None)
+
+
+def reset_request_user(token: Token) -> None:
+    _request_user.reset(token)
+
+
+def request_user(platform: str, external_id: int | None) -> CachedUser | None:
+    bound = _request_user.get()
+    if bound is None or external_id is None or bound[:2] != (platform, int(external_id)):
+        return None
+    return bound[2]
+
+
+class IdentityCache(TTLCache[tuple[str, int], CachedUser]):
+    """Bounded LRU of (platform, external id) -> tg_users row, shared by every DBController call in the process.
+
+    Only users that exist are cached. Writers in this process invalidate their keys; entries also expire after
+    `ttl` seconds because the Telegram bot, the MAX bot and the reminder workers do not see each other's writes.
+    The row bound to the current update answers lookups of its user first.
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL_SECONDS) -> None:
+        super().__init__(maxsize, ttl)
+
+    def get(self, platform: str, external_id: int) -> CachedUser | None:
+        bound = request_user(platform, external_id)
+        if bound is not None:
+            self.hits += 1
+            return bound
+        return super().get((platform, int(external_id)))
+
+    def put(self, platform: str, external_id: int, user: CachedUser) -> None:
+        if request_user(platform, external_id) is not None:
+            bind_request_user(platform, external_id, user)
+        super().put((platform, int(external_id)), user)
+
+    def invalidate(self, platform: str, external_id: int | None) -> None:
+        if external_id is not None:
+            self.pop((platform, int(external_id)))
+        if request_user(platform, external_id) is not None:
+            bind_request_user(platform, external_id, None)
+
+
+identity_cache = IdentityCache()
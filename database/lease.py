@@ -0,0 +1,68 @@
+import logging
+import os
+import tempfile
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy import text
+
+from database import session as db_session
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_path(name: str) -> str:
+    database = db_session.engine.url.database
+    if database and database != ":memory:":
+        return f"{os.path.abspath(database)}.{name}.lock"
+    return os.path.join(tempfile.gettempdir(), f"tg_organazer.{name}.lock")
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[bool]:
+    with open(path, "a+") as lock_file:
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@asynccontextmanager
+async def run_lease(name: str) -> AsyncIterator[bool]:
+    """Non-blocking cross-process lease: yields False while another process holds `name`.
+
+    Postgres uses a session advisory lock, SQLite a lock file next to the database.
+    """
+    engine = db_session.engine
+    if engine.dialect.name != "postgresql":
+        with _file_lock(_lock_path(name)) as acquired:
+            yield acquired
+        return
+
+    key = zlib.crc32(f"tg_organazer:{name}".encode())
+    async with engine.connect() as conn:
+        acquired = bool((await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Time, func
+from sqlalchemy import BigInteger, Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, Time, func
 from sqlalchemy.orm import relationship
 
 from database.session import Base
@@ -33,6 +33,30 @@ class DbEvent(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Календарь: события владельца в диапазоне дат
+        Index("ix_events_user_start_at", user_id, start_at),
+        # Напоминания: минута start_time и признак повтора, по частичному индексу на каждый вид повтора
+        Index("ix_events_start_time", start_time),
+        Index(
+            "ix_events_start_time_single",
+            start_time,
+            start_at,
+            postgresql_where=single_event.is_(True),
+            sqlite_where=single_event.is_(True),
+        ),
+        Index("ix_events_start_time_daily", start_time, postgresql_where=daily.is_(True), sqlite_where=daily.is_(True)),
+        Index("ix_events_start_time_weekly", start_time, weekly, postgresql_where=weekly.is_not(None), sqlite_where=weekly.is_not(None)),
+        Index(
+            "ix_events_start_time_monthly",
+            start_time,
+            monthly,
+            postgresql_where=monthly.is_not(None),
+            sqlite_where=monthly.is_not(None),
+        ),
+        Index("ix_events_annual", annual_month, annual_day),
+    )
+
 
 class CanceledEvent(Base):
     __tablename__ = "canceled_events"
@@ -43,6 +67,8 @@ class CanceledEvent(Base):
 
     event = relationship(DbEvent, back_populates="canceled_events")
 
+    __table_args__ = (Index("ix_canceled_events_event_date", event_id, cancel_date),)
+
 
 class EventParticipant(Base):
     __tablename__ = "event_participants"
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint, func
+
+from database.models.event_models import DbEvent
+from database.models.user_model import User
+from database.session import Base
+
+
+class SentReminder(Base):
+    __tablename__ = "sent_reminders"
+    __table_args__ = (UniqueConstraint("event_id", "occurrence_utc", "lead_minutes", name="uq_sent_reminders_occurrence"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(Integer, ForeignKey(DbEvent.id, ondelete="CASCADE"), nullable=False)
+    occurrence_utc = Column(DateTime(timezone=True), nullable=False, index=True, comment="Время наступления события в UTC")
+    lead_minutes = Column(Integer, nullable=False, comment="За сколько минут до события отправлено напоминание")
+
+    claimed_at = Column(DateTime(timezone=True), nullable=True, comment="Когда напоминание взято в отправку, sent_at до подтверждения NULL")
+    sent_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SentDigest(Base):
+    __tablename__ = "sent_digests"
+    __table_args__ = (UniqueConstraint("user_id", "digest_date", name="uq_sent_digests_user_date"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey(User.id, ondelete="CASCADE"), nullable=False)
+    digest_date = Column(Date, nullable=False, index=True, comment="Локальная дата, за которую отправлен дайджест")
+    sent_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReminderCheckpoint(Base):
+    __tablename__ = "reminder_checkpoints"
+
+    name = Column(String(32), primary_key=True)
+    completed_at = Column(DateTime(timezone=True), nullable=False, comment="Последняя полностью обработанная минута, UTC")
+
+
+class ReminderQueue(Base):
+    __tablename__ = "reminder_queue"
+    __table_args__ = (UniqueConstraint("event_id", "fire_at", name="uq_reminder_queue_occurrence"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fire_at = Column(DateTime(timezone=True), nullable=False, index=True, comment="Время наступления события в UTC")
+    event_id = Column(Integer, ForeignKey(DbEvent.id, ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey(User.id, ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String, false, func, true
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String, Time, false, func, true
 
 from database.session import Base
 
@@ -18,8 +18,12 @@ class User(Base):
     time_zone = Column(String(50), nullable=True)
     city = Column(String(120), nullable=True)
     language_code = Column(String(5), nullable=True)
+    digest_time = Column(Time, nullable=True, comment="Локальное время ежедневной сводки, NULL - сводка выключена")
 
     is_chat = Column(Boolean, server_default=false(), comment="Признак пользователя или чата")
+    tg_delivery_failures = Column(Integer, nullable=False, server_default="0", comment="Неудачных отправок в Telegram подряд")
+    max_delivery_failures = Column(Integer, nullable=False, server_default="0", comment="Неудачных отправок в MAX подряд")
+    events_version = Column(Integer, nullable=False, server_default="0", comment="Растет при каждом изменении событий пользователя")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,143 @@
+from bisect import bisect_left
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from database.models.event_models import DbEvent
+
+
+def effective_month_day(year: int, month: int, day: int) -> int:
+    _, num_days = monthrange(year, month)
+    return day if day <= num_days else num_days
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _months(first: date, last: date) -> Iterator[tuple[int, int]]:
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield year, month
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+
+
+Rule = tuple[str | int, ...]
+
+
+def _rule(event: DbEvent, anchor: date) -> Rule | None:
+    """Key of the local dates a repeating event falls on, shared by every event with the same period and anchor day."""
+    if event.daily:
+        return ("daily",)
+    if event.weekly is not None:
+        return ("weekly", anchor.weekday())
+    if event.monthly is not None:
+        return ("monthly", anchor.day)
+    if event.annual_day is not None:
+        return ("annual", anchor.month, anchor.day)
+    return None
+
+
+def _rule_dates(rule: Rule, first: date, last: date) -> list[date]:
+    """Local dates in [first, last] a rule falls on, stepping by its period instead of probing every day."""
+    kind = rule[0]
+    if kind == "daily":
+        return [first + timedelta(days=shift) for shift in range((last - first).days + 1)]
+    if kind == "weekly":
+        day = first + timedelta(days=(rule[1] - first.weekday()) % 7)
+        return [day + timedelta(days=7 * step) for step in range((last - day).days // 7 + 1)] if day <= last else []
+    if kind == "monthly":
+        days = (date(year, month, effective_month_day(year, month, rule[1])) for year, month in _months(first, last))
+        return [day for day in days if first <= day <= last]
+    days = []
+    for year in range(first.year, last.year + 1):
+        try:
+            day = date(year, rule[1], rule[2])
+        except ValueError:  # 29 февраля в невисокосный год
+            continue
+        if first <= day <= last:
+            days.append(day)
+    return days
+
+
+def _cancel_dates(event: DbEvent, cancellations: dict[int, set[date]] | None) -> set[date]:
+    if cancellations is not None:
+        return cancellations.get(event.id, set())
+    return {_ev.cancel_date for _ev in event.canceled_events}
+
+
+def _expand(
+    events: Iterable[DbEvent],
+    start: datetime,
+    end: datetime,
+    zone_of: Callable[[DbEvent], tzinfo],
+    cancellations: dict[int, set[date]] | None,
+) -> Iterator[tuple[DbEvent, datetime]]:
+    """Occurrences in [start, end) in the zone of each event, in the order of `events`.
+
+    The dates of a rule are computed once per zone and rule and shared by all events on it; an event only
+    skips the dates before its own start.
+    """
+    windows: dict[tzinfo, tuple[datetime, datetime]] = {}
+    rule_dates: dict[tuple[tzinfo, Rule], list[date]] = {}
+    for event in events:
+        tz = zone_of(event)
+        if tz not in windows:
+            windows[tz] = (start.astimezone(tz), end.astimezone(tz))
+        local_start, local_end = windows[tz]
+        if local_end <= local_start:
+            return
+
+        anchor = _as_utc(event.start_at).astimezone(tz)
+        rule = _rule(event, anchor.date())
+        if rule is None:
+            days: Iterable[date] = (anchor.date(),) if local_start.date() <= anchor.date() <= local_end.date() else ()
+        else:
+            key = (tz, rule)
+            if key not in rule_dates:
+                rule_dates[key] = _rule_dates(rule, local_start.date(), local_end.date())
+            dates = rule_dates[key]
+            days = islice(dates, bisect_left(dates, anchor.date()), None)
+
+        cancel_dates = _cancel_dates(event, cancellations)
+        for day in days:
+            if day in cancel_dates:
+                continue
+            occurrence = datetime.combine(day, anchor.time(), tzinfo=tz)
+            if local_start <= occurrence < local_end:
+                yield event, occurrence
+
+
+def expand_occurrences(
+    events: Iterable[DbEvent],
+    start: datetime,
+    end: datetime,
+    tz: tzinfo,
+    cancellations: dict[int, set[date]] | None = None,
+) -> Iterator[tuple[DbEvent, datetime]]:
+    """Yield (event, occurrence) for every occurrence in [start, end), occurrences are aware datetimes in `tz`.
+
+    `events` are DbEvent objects or rows projecting the same columns.
+    The recurrence follows the event start as seen in `tz`, a cancel date removes the occurrence on that local date.
+    `cancellations` is an {event_id: dates} map covering the window; without it event.canceled_events is read.
+    Cost is linear in events plus produced occurrences.
+    """
+    yield from _expand(events, start, end, lambda _: tz, cancellations)
+
+
+def expand_occurrences_batch(
+    events: Iterable[DbEvent],
+    start: datetime,
+    end: datetime,
+    cancellations: dict[int, set[date]] | None = None,
+    local_tz: Callable[[DbEvent], tzinfo] | None = None,
+) -> list[tuple[DbEvent, datetime]]:
+    """expand_occurrences for bulk scans over many owners, e.g. reminder pages and queue refills; occurrences are in UTC.
+
+    Every event recurs on its owner's wall clock exactly as the calendar shows it: `local_tz(event)` gives the owner's
+    zone, UTC without it. Across a daylight saving change the UTC time of an occurrence moves with the local offset.
+    Events sharing a zone and a rule, e.g. every weekly event on a Monday, step through one list of dates.
+    """
+    zone_of = local_tz or (lambda _: timezone.utc)
+    return [(event, occurrence.astimezone(timezone.utc)) for event, occurrence in _expand(events, start, end, zone_of, cancellations)]
@@ -0,0 +1,19 @@
+from typing import Any, Hashable
+
+from config import RENDER_CACHE_SIZE, RENDER_CACHE_TTL_SECONDS
+from database.ttl_cache import TTLCache
+
+
+class RenderCache(TTLCache[Hashable, Any]):
+    """Bounded LRU of rendered calendar keyboards.
+
+    Keys carry the owner's events_version, so an event write makes the old entries unreachable instead of
+    invalidating them; they fall out as the LRU fills up. Entries also expire after `ttl` seconds in case a
+    writer outside the bots changed events without bumping the version.
+    """
+
+    def __init__(self, maxsize: int = RENDER_CACHE_SIZE, ttl: float = RENDER_CACHE_TTL_SECONDS) -> None:
+        super().__init__(maxsize, ttl)
+
+
+calendar_cache = RenderCache()
@@ -54,6 +54,38 @@ class Event(BaseModel):
         return f"{self.event_date.day} {(MONTH_NAMES[int(self.event_date.month) - 1]).title()} {self.event_date.year} года"
 
 
+class DayEvent(BaseModel):
+    """An event occurrence, its date and times are local to the user."""
+
+    day: datetime.date
+    event_id: int
+    description: str
+    emoji: str | None = None
+    start_time: datetime.time
+    stop_time: datetime.time | None = None
+    recurrent: Recurrent = Recurrent.never
+
+    def time_range(self) -> str:
+        start = self.start_time.strftime("%H:%M")
+        return f"{start}-{self.stop_time.strftime('%H:%M')}" if self.stop_time else start
+
+    def line(self) -> str:
+        emoji_prefix = f"{self.emoji} " if self.emoji else ""
+        recurrent = f"({self.recurrent.get_name().lower()})" if self.recurrent != Recurrent.never else ""
+        prefix = f"{emoji_prefix}{self.time_range()} {recurrent}".strip()
+        return f"{prefix} - {self.description}"
+
+    def button_text(self) -> str:
+        emoji_prefix = f"{self.emoji} " if self.emoji else ""
+        return f"{emoji_prefix}{self.time_range()}\n{self.description[:20]}"
+
+
+class DayView(BaseModel):
+    day: datetime.date
+    events: list[DayEvent] = Field(default_factory=list)  # ordered as the day's buttons
+    week_counts: dict[datetime.date, int] = Field(default_factory=dict)  # Monday to Sunday of the day's week
+
+
 class TgUser(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -23,6 +23,7 @@ def _commands_for_locale(locale: str) -> list[BotCommand]:
             BotCommand("team", "Manage participants"),
             BotCommand("help", "Help"),
             BotCommand("language", "Change language"),
+            BotCommand("digest", "Daily agenda"),
         ]
     return [
         BotCommand("start", "Запустить бота"),
@@ -30,6 +31,7 @@ def _commands_for_locale(locale: str) -> list[BotCommand]:
         BotCommand("team", "Управление участниками"),
         BotCommand("help", "Помощь"),
         BotCommand("language", "Сменить язык"),
+        BotCommand("digest", "Ежедневная сводка"),
     ]
 
 
@@ -223,3 +225,28 @@ async def handle_language(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     else:
         await update.message.reply_text(tr("Language switched to English.", selected))
     await show_main_menu_keyboard(update.message)
+
+
+async def handle_digest(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.message or not update.effective_chat:
+        return
+
+    args = getattr(context, "args", None) or []
+    locale = await resolve_user_locale(getattr(update.effective_chat, "id", None), platform="tg")
+    if not args:
+        await update.message.reply_text(tr("Use: /digest HH:MM|off", locale))
+        return
+
+    if args[0].lower() == "off":
+        await db_controller.set_digest_time(user_id=update.effective_chat.id, digest_time=None, platform="tg")
+        await update.message.reply_text(tr("Ежедневная сводка отключена.", locale))
+        return
+
+    try:
+        digest_time = datetime.strptime(args[0], "%H:%M").time()
+    except ValueError:
+        await update.message.reply_text(tr("Use: /digest HH:MM|off", locale))
+        return
+
+    await db_controller.set_digest_time(user_id=update.effective_chat.id, digest_time=digest_time, platform="tg")
+    await update.message.reply_text(tr("Ежедневная сводка будет приходить в {time}.", locale).format(time=digest_time.strftime("%H:%M")))
@@ -7,16 +7,21 @@ from dotenv import load_dotenv
 from telegram import BotCommand, Update
 from telegram.error import BadRequest
 from telegram.ext import (
+    Application,
     ApplicationBuilder,
     CallbackQueryHandler,
     CommandHandler,
     ContextTypes,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
 # ggg
 from config import SERVICE_ACCOUNTS, TOKEN, WEBHOOK_SECRET_TOKEN, WEBHOOK_URL
+from database.db_controller import db_controller
+from database.cache_stats import log_cache_stats
+from database.identity_cache import bind_request_user, reset_request_user
 from database.session import engine
 from handlers.cal import handle_calendar_callback, show_calendar
 from handlers.contacts import handle_contact, handle_team_callback, handle_team_command
@@ -36,7 +41,7 @@ from handlers.events import (
 )
 from handlers.link import handle_link_callback
 from handlers.notes import handle_note_callback, handle_note_text_input, show_notes
-from handlers.start import handle_help, handle_language, handle_location, handle_skip, start
+from handlers.start import handle_digest, handle_help, handle_language, handle_location, handle_skip, start
 from i18n import resolve_user_locale, tr, translate_markup
 
 load_dotenv(".env")
@@ -123,6 +128,28 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
     logger.exception("Unhandled error", exc_info=context.error)
 
 
+async def bind_update_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Load the sender's row once per update; locale, row id and profile lookups of the handlers reuse it.
+
+    RequestUserApplication drops the binding once the update is processed.
+    """
+    user = update.effective_user
+    if user is not None:
+        bind_request_user("tg", user.id, await db_controller.load_request_user(user.id, platform="tg"))
+
+
+class RequestUserApplication(Application):
+    """Application that resets the request user bound by bind_update_user after every update, even when a handler failed."""
+
+    async def process_update(self, update: object) -> None:
+        token = bind_request_user("tg", None, None)
+        try:
+            await super().process_update(update)
+        finally:
+            reset_request_user(token)
+            log_cache_stats()
+
+
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.info("handle_text")
     logger.info(update)
@@ -307,6 +334,7 @@ async def set_commands(app):
         BotCommand("team", "Управление участниками"),
         BotCommand("help", "Помощь"),
         BotCommand("language", "Сменить язык"),
+        BotCommand("digest", "Ежедневная сводка"),
     ]
     commands_en = [
         BotCommand("start", "Start bot"),
@@ -314,6 +342,7 @@ async def set_commands(app):
         BotCommand("team", "Manage participants"),
         BotCommand("help", "Help"),
         BotCommand("language", "Change language"),
+        BotCommand("digest", "Daily agenda"),
     ]
     await app.bot.set_my_commands(commands_ru, language_code="ru")
     await app.bot.set_my_commands(commands_en, language_code="en")
@@ -332,13 +361,15 @@ async def shutdown(app):
 
 def main() -> None:
     proxy = os.environ["TG_PROXY"]
-    application = ApplicationBuilder().token(TOKEN).proxy(proxy).post_shutdown(shutdown).build()
+    application = ApplicationBuilder().application_class(RequestUserApplication).token(TOKEN).proxy(proxy).post_shutdown(shutdown).build()
     patch_telegram_bot_i18n(application.bot)
+    application.add_handler(TypeHandler(Update, bind_update_user), group=-1)
 
     # start, Получение геолокации и Пропуск геолокации
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", handle_help))
     application.add_handler(CommandHandler("language", handle_language))
+    application.add_handler(CommandHandler("digest", handle_digest))
     application.add_handler(CommandHandler("team", handle_team_command))
     application.add_handler(CommandHandler("my_id", handle_my_id))
     application.add_handler(MessageHandler(filters.LOCATION, handle_location))
@@ -1,11 +1,12 @@
 import logging
 from calendar import monthrange
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
 import config
 from database.db_controller import db_controller
-from entities import MaxUser
+from database.render_cache import calendar_cache
+from entities import DayView, MaxUser
 from i18n import format_localized_date, month_year_label, resolve_user_locale, tr, weekday_labels
 from max_bot.compat import InlineKeyboardButton, InlineKeyboardMarkup
 from max_bot.context import MaxContext, MaxUpdate
@@ -20,6 +21,11 @@ def to_superscript(number: int) -> str:
     return str(number).translate(superscript_map)
 
 
+def _copy_markup(markup: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
+    # MAX markups are mutable (the menu button is appended in place), cached ones are handed out as copies.
+    return InlineKeyboardMarkup([list(row) for row in markup.inline_keyboard])
+
+
 async def generate_calendar(
     user_id: int,
     year: int,
@@ -28,6 +34,12 @@ async def generate_calendar(
     locale: str | None = None,
     city: str | None = None,
 ) -> InlineKeyboardMarkup:
+    version = await db_controller.get_events_version(user_id, platform="max")
+    cache_key = ("max", user_id, "month", year, month, tz_name, locale, version)
+    cached = calendar_cache.get(cache_key)
+    if cached is not None:
+        return _copy_markup(cached)
+
     event_dict = await db_controller.get_current_month_events_by_user(
         user_id=user_id,
         month=month,
@@ -74,7 +86,9 @@ async def generate_calendar(
             week.append(InlineKeyboardButton(EMPTY_DAY_TEXT, callback_data="cal_ignore"))
         keyboard.append(week)
 
-    return InlineKeyboardMarkup(keyboard)
+    reply_markup = InlineKeyboardMarkup(keyboard)
+    calendar_cache.put(cache_key, reply_markup)
+    return _copy_markup(reply_markup)
 
 
 async def build_calendar_message_text(
@@ -106,18 +120,24 @@ async def generate_week_calendar(
     tz_name: str = config.DEFAULT_TIMEZONE_NAME,
     locale: str | None = None,
 ) -> InlineKeyboardMarkup:
+    version = await db_controller.get_events_version(user_id, platform="max")
+    cache_key = ("max", user_id, "week", year, month, day, tz_name, locale, version)
+    cached = calendar_cache.get(cache_key)
+    if cached is not None:
+        return _copy_markup(cached)
+
     ref_date = date(year, month, day)
-    week_start = ref_date - timedelta(days=ref_date.weekday())
-    week_dates = [week_start + timedelta(days=i) for i in range(7)]
-
-    event_dicts: dict[tuple[int, int], dict[int, int]] = {}
-    for day_date in week_dates:
-        key = (day_date.year, day_date.month)
-        if key not in event_dicts:
-            event_dicts[key] = await db_controller.get_current_month_events_by_user(
-                user_id=user_id, month=day_date.month, year=day_date.year, tz_name=tz_name, platform="max"
-            )
+    week_start = datetime.combine(ref_date - timedelta(days=ref_date.weekday()), time(), tzinfo=ZoneInfo(tz_name))
+    week_counts = await db_controller.get_occurrences(
+        user_id=user_id, start=week_start, end=week_start + timedelta(days=7), tz_name=tz_name, mode="counts", platform="max"
+    )
+    reply_markup = build_week_calendar(DayView(day=ref_date, week_counts=week_counts), locale=locale)
+    calendar_cache.put(cache_key, reply_markup)
+    return _copy_markup(reply_markup)
 
+
+def build_week_calendar(view: DayView, locale: str | None = None) -> InlineKeyboardMarkup:
+    ref_date = view.day
     header = month_year_label(year=ref_date.year, month=ref_date.month, locale=locale)
 
     prev_week = ref_date - timedelta(days=7)
@@ -136,9 +156,7 @@ async def generate_week_calendar(
     keyboard.append([InlineKeyboardButton(day, callback_data="cal_ignore") for day in weekdays])
 
     week_row = []
-    for day_date in week_dates:
-        event_dict = event_dicts[(day_date.year, day_date.month)]
-        number_events = event_dict.get(day_date.day)
+    for day_date, number_events in view.week_counts.items():
         show_day = f"{day_date.day}{to_superscript(number_events)}" if number_events else day_date.day
         week_row.append(InlineKeyboardButton(str(show_day), callback_data=f"cal_select_{day_date.year}_{day_date.month}_{day_date.day}"))
     keyboard.append(week_row)
@@ -215,17 +233,7 @@ async def build_day_view(
     tz_name: str,
     locale: str | None = None,
 ) -> tuple[str, InlineKeyboardMarkup]:
-    events = await db_controller.get_current_day_events_by_user(
-        user_id=user_id,
-        month=month,
-        year=year,
-        day=day,
-        tz_name=tz_name,
-        platform="max",
-    )
-    events_list = await db_controller.get_current_day_events_by_user(
-        user_id=user_id, month=month, year=year, day=day, tz_name=tz_name, deleted=True, platform="max"
-    )
+    view = await db_controller.get_day_view(user_id=user_id, year=year, month=month, day=day, tz_name=tz_name, platform="max")
 
     reply_btn_create = InlineKeyboardButton(
         tr("✍️ Создать событие на {date}", locale).format(date=f"{day:02d}.{month:02d}.{year}"),
@@ -237,17 +245,17 @@ async def build_day_view(
 
     delete_row = []
     event_buttons = []
-    if events:
+    if view.events:
         delete_row.append(reply_btn_delete)
-        for ev_text, ev_id, _ in events_list:
-            btn_text = str(ev_text).replace("\n", " - ").strip()
+        for item in view.events:
+            btn_text = item.button_text().replace("\n", " - ").strip()
             if btn_text:
-                event_buttons.append([InlineKeyboardButton(btn_text, callback_data=f"edit_event_{ev_id}")])
+                event_buttons.append([InlineKeyboardButton(btn_text, callback_data=f"edit_event_{item.event_id}")])
         text = tr("События на <b>{date}</b>:", locale).format(date=formatted_date)
     else:
         text = tr("Вы выбрали дату: <b>{date}</b>", locale).format(date=formatted_date)
 
-    calendar_markup = await generate_week_calendar(year=year, month=month, day=day, user_id=user_id, tz_name=tz_name, locale=locale)
+    calendar_markup = build_week_calendar(view, locale=locale)
     reply_markup = InlineKeyboardMarkup(list(calendar_markup.inline_keyboard) + event_buttons + [action_row] + [delete_row])
     return text, reply_markup
 
@@ -172,3 +172,29 @@ async def show_main_menu(message: MaxMessage, add_text: str | None = None) -> No
     text = f"{add_text}\n\n{tr('Выберите действие:', locale)}" if add_text else tr("Выберите действие:", locale)
 
     await message.reply_text(text=text, reply_markup=reply_markup)
+
+
+async def handle_digest(update: MaxUpdate, context: MaxContext) -> None:
+    if not update.message or not update.effective_chat:
+        return
+
+    locale = await resolve_user_locale(update.effective_chat.id, platform="max")
+    parts = (update.message.text or "").split(maxsplit=1)
+    if len(parts) < 2:
+        await update.message.reply_text(tr("Use: /digest HH:MM|off", locale))
+        return
+
+    value = parts[1].strip()
+    if value.lower() == "off":
+        await db_controller.set_digest_time(user_id=update.effective_chat.id, digest_time=None, platform="max")
+        await update.message.reply_text(tr("Ежедневная сводка отключена.", locale))
+        return
+
+    try:
+        digest_time = datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        await update.message.reply_text(tr("Use: /digest HH:MM|off", locale))
+        return
+
+    await db_controller.set_digest_time(user_id=update.effective_chat.id, digest_time=digest_time, platform="max")
+    await update.message.reply_text(tr("Ежедневная сводка будет приходить в {time}.", locale).format(time=digest_time.strftime("%H:%M")))
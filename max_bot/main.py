@@ -17,6 +17,8 @@ if __package__ in {None, ""}:
 
 from config import MAX_POLL_TIMEOUT, MAX_WEBHOOK_PORT, TOKEN, WEBHOOK_MAX_SECRET, WEBHOOK_MAX_URL
 from database.db_controller import db_controller
+from database.cache_stats import log_cache_stats
+from database.identity_cache import bind_request_user, reset_request_user
 from i18n import normalize_locale, resolve_user_locale, tr
 from max_bot.client import build_max_api
 from max_bot.compat import InlineKeyboardButton, InlineKeyboardMarkup
@@ -45,6 +47,7 @@ from max_bot.handlers.start import (
     MAIN_MENU_NOTES_TEXT,
     MAIN_MENU_UPCOMING_TEXT,
     SKIP_LOCATION_TEXT,
+    handle_digest,
     handle_help,
     handle_location,
     handle_skip,
@@ -394,6 +397,8 @@ async def dispatch_update(update: MaxUpdate, context: MaxContext) -> None:
                 await update.message.reply_text(
                     tr("Язык переключен на русский.", selected) if selected == "ru" else tr("Language switched to English.", selected)
                 )
+    elif text.startswith("/digest"):
+        await handle_digest(update, context)
     elif text.startswith("/help"):
         await handle_help(update, context)
     elif text.startswith("/team"):
@@ -524,10 +529,16 @@ async def _process_raw_update(raw_update: dict, api: "MaxApi") -> None:
     if not chat:
         return
     context = MaxContext(bot=api, chat_data=chat_state.get(chat.id))
+    token = bind_request_user("max", None, None)
     try:
+        # The sender's row is read once; locale, row id and profile lookups during the update reuse it.
+        bind_request_user("max", chat.id, await db_controller.load_request_user(chat.id, platform="max"))
         await dispatch_update(parsed, context)
     except Exception:  # noqa: BLE001
         logger.exception("Failed to handle update: %s", raw_update)
+    finally:
+        reset_request_user(token)
+        log_cache_stats()
 
 
 async def _handle_webhook_payload(payload: object) -> None:
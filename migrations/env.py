@@ -10,6 +10,7 @@ from database.session import Base, get_database_url  # или from database impo
 from database.models.user_model import User, UserRelation
 from database.models.event_models import DbEvent, CanceledEvent
 from database.models.note_model import DbNote
+from database.models.reminder_models import SentReminder, SentDigest, ReminderCheckpoint, ReminderQueue
 
 config = context.config
 if config.config_file_name is not None:
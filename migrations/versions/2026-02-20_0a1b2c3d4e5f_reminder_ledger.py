@@ -0,0 +1,47 @@
+"""sent reminders ledger and run checkpoints
+
+Revision ID: 0a1b2c3d4e5f
+Revises: e4f5a6b7c8d9, f6a7b8c9d0e1
+Create Date: 2026-02-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a1b2c3d4e5f"
+down_revision: Union[str, Sequence[str], None] = ("e4f5a6b7c8d9", "f6a7b8c9d0e1")
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "sent_reminders",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("occurrence_utc", sa.DateTime(timezone=True), nullable=False, comment="Время наступления события в UTC"),
+        sa.Column("lead_minutes", sa.Integer(), nullable=False, comment="За сколько минут до события отправлено напоминание"),
+        sa.Column("sent_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("event_id", "occurrence_utc", "lead_minutes", name="uq_sent_reminders_occurrence"),
+    )
+    op.create_index(op.f("ix_sent_reminders_occurrence_utc"), "sent_reminders", ["occurrence_utc"], unique=False)
+    op.create_table(
+        "reminder_checkpoints",
+        sa.Column("name", sa.String(length=32), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=False, comment="Последняя полностью обработанная минута, UTC"),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("reminder_checkpoints")
+    op.drop_index(op.f("ix_sent_reminders_occurrence_utc"), table_name="sent_reminders")
+    op.drop_table("sent_reminders")
@@ -0,0 +1,40 @@
+"""materialized reminder queue
+
+Revision ID: 1b2c3d4e5f60
+Revises: 0a1b2c3d4e5f
+Create Date: 2026-02-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1b2c3d4e5f60"
+down_revision: Union[str, Sequence[str], None] = "0a1b2c3d4e5f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "reminder_queue",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("fire_at", sa.DateTime(timezone=True), nullable=False, comment="Время наступления события в UTC"),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["event_id"], ["events.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["tg_users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("event_id", "fire_at", name="uq_reminder_queue_occurrence"),
+    )
+    op.create_index(op.f("ix_reminder_queue_fire_at"), "reminder_queue", ["fire_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_reminder_queue_fire_at"), table_name="reminder_queue")
+    op.drop_table("reminder_queue")
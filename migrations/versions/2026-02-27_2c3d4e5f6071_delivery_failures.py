@@ -0,0 +1,36 @@
+"""delivery failure counters on tg_users
+
+Revision ID: 2c3d4e5f6071
+Revises: 1b2c3d4e5f60
+Create Date: 2026-02-27 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c3d4e5f6071"
+down_revision: Union[str, Sequence[str], None] = "1b2c3d4e5f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.add_column(
+            sa.Column("tg_delivery_failures", sa.Integer(), server_default="0", nullable=False, comment="Неудачных отправок в Telegram подряд")
+        )
+        batch_op.add_column(
+            sa.Column("max_delivery_failures", sa.Integer(), server_default="0", nullable=False, comment="Неудачных отправок в MAX подряд")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.drop_column("max_delivery_failures")
+        batch_op.drop_column("tg_delivery_failures")
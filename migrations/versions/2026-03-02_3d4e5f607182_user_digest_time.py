@@ -0,0 +1,32 @@
+"""daily digest time on tg_users
+
+Revision ID: 3d4e5f607182
+Revises: 2c3d4e5f6071
+Create Date: 2026-03-02 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3d4e5f607182"
+down_revision: Union[str, Sequence[str], None] = "2c3d4e5f6071"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.add_column(
+            sa.Column("digest_time", sa.Time(), nullable=True, comment="Локальное время ежедневной сводки, NULL - сводка выключена")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.drop_column("digest_time")
@@ -0,0 +1,44 @@
+"""indexes for calendar and reminder event queries
+
+Revision ID: 4e5f60718293
+Revises: 3d4e5f607182
+Create Date: 2026-03-05 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e5f60718293"
+down_revision: Union[str, Sequence[str], None] = "3d4e5f607182"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _where(clause) -> dict:
+    return {"postgresql_where": clause, "sqlite_where": clause}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_events_user_start_at", "events", ["user_id", "start_at"])
+    op.create_index("ix_events_start_time", "events", ["start_time"])
+    op.create_index("ix_events_start_time_single", "events", ["start_time", "start_at"], **_where(sa.column("single_event").is_(True)))
+    op.create_index("ix_events_start_time_daily", "events", ["start_time"], **_where(sa.column("daily").is_(True)))
+    op.create_index("ix_events_start_time_weekly", "events", ["start_time", "weekly"], **_where(sa.column("weekly").is_not(None)))
+    op.create_index("ix_events_start_time_monthly", "events", ["start_time", "monthly"], **_where(sa.column("monthly").is_not(None)))
+    op.create_index("ix_events_annual", "events", ["annual_month", "annual_day"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_events_annual", table_name="events")
+    op.drop_index("ix_events_start_time_monthly", table_name="events")
+    op.drop_index("ix_events_start_time_weekly", table_name="events")
+    op.drop_index("ix_events_start_time_daily", table_name="events")
+    op.drop_index("ix_events_start_time_single", table_name="events")
+    op.drop_index("ix_events_start_time", table_name="events")
+    op.drop_index("ix_events_user_start_at", table_name="events")
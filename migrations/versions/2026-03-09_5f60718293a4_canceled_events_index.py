@@ -0,0 +1,27 @@
+"""index cancellations by event and date
+
+Revision ID: 5f60718293a4
+Revises: 4e5f60718293
+Create Date: 2026-03-09 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f60718293a4"
+down_revision: Union[str, Sequence[str], None] = "4e5f60718293"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_canceled_events_event_date", "canceled_events", ["event_id", "cancel_date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_canceled_events_event_date", table_name="canceled_events")
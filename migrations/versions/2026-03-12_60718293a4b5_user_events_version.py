@@ -0,0 +1,32 @@
+"""events version counter on tg_users
+
+Revision ID: 60718293a4b5
+Revises: 5f60718293a4
+Create Date: 2026-03-12 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "60718293a4b5"
+down_revision: Union[str, Sequence[str], None] = "5f60718293a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.add_column(
+            sa.Column("events_version", sa.Integer(), server_default="0", nullable=False, comment="Растет при каждом изменении событий пользователя")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("tg_users") as batch_op:
+        batch_op.drop_column("events_version")
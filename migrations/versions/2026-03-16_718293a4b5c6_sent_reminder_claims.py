@@ -0,0 +1,39 @@
+"""claim status on sent_reminders
+
+Revision ID: 718293a4b5c6
+Revises: 60718293a4b5
+Create Date: 2026-03-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "718293a4b5c6"
+down_revision: Union[str, Sequence[str], None] = "60718293a4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("sent_reminders") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "claimed_at",
+                sa.DateTime(timezone=True),
+                nullable=True,
+                comment="Когда напоминание взято в отправку, sent_at до подтверждения NULL",
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Unconfirmed claims would read as sent without the status column.
+    op.execute("DELETE FROM sent_reminders WHERE sent_at IS NULL")
+    with op.batch_alter_table("sent_reminders") as batch_op:
+        batch_op.drop_column("claimed_at")
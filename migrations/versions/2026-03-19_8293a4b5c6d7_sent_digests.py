@@ -0,0 +1,39 @@
+"""sent digests ledger
+
+Revision ID: 8293a4b5c6d7
+Revises: 718293a4b5c6
+Create Date: 2026-03-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8293a4b5c6d7"
+down_revision: Union[str, Sequence[str], None] = "718293a4b5c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "sent_digests",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("digest_date", sa.Date(), nullable=False, comment="Локальная дата, за которую отправлен дайджест"),
+        sa.Column("sent_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["tg_users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "digest_date", name="uq_sent_digests_user_date"),
+    )
+    op.create_index(op.f("ix_sent_digests_digest_date"), "sent_digests", ["digest_date"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_sent_digests_digest_date"), table_name="sent_digests")
+    op.drop_table("sent_digests")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+import httpx
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from config import (
+    MAX_CHAT_RATE_LIMIT,
+    MAX_RATE_LIMIT,
+    REMINDER_DELIVERY_CONCURRENCY,
+    REMINDER_DELIVERY_RETRIES,
+    TG_CHAT_RATE_LIMIT,
+    TG_RATE_LIMIT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self._capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    @property
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return self._tokens >= self._capacity and self._blocked_until <= now
+
+    def block_for(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds`, used when the API answers with a flood-wait."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._blocked_until > now:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class PlatformRateLimiter:
+    """Global messages/sec cap for a platform plus a separate cap for every chat."""
+
+    def __init__(self, rate: float, chat_rate: float) -> None:
+        self._global = TokenBucket(rate)
+        self._chat_rate = chat_rate
+        self._chats: dict[int, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_rate)
+        return bucket
+
+    async def acquire(self, chat_id: int) -> None:
+        await self._chat_bucket(chat_id).acquire()
+        await self._global.acquire()
+
+    def block_for(self, seconds: float, chat_id: int | None = None) -> None:
+        if chat_id is None:
+            self._global.block_for(seconds)
+        else:
+            self._chat_bucket(chat_id).block_for(seconds)
+
+    def prune(self) -> None:
+        self._chats = {chat_id: bucket for chat_id, bucket in self._chats.items() if not bucket.idle}
+
+
+def _retry_after_seconds(exc: Exception) -> float | None:
+    if isinstance(exc, RetryAfter):
+        value = exc.retry_after
+        return value.total_seconds() if isinstance(value, timedelta) else float(value)
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        header = exc.response.headers.get("Retry-After")
+        try:
+            return float(header) if header else 1.0
+        except ValueError:
+            return 1.0
+    return None
+
+
+def _is_unreachable(exc: Exception) -> bool:
+    """The recipient blocked the bot or the chat is gone; retrying will not help."""
+    if isinstance(exc, Forbidden):
+        return True
+    if isinstance(exc, BadRequest):
+        return "chat not found" in exc.message.lower()
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in (403, 404)
+    return False
+
+
+class ReminderDispatcher:
+    """Sends reminders concurrently while keeping every platform inside its rate limits.
+
+    `shards` worker processes split the platform-wide limits evenly; per-chat limits stay whole,
+    a chat is only served by the shard that owns its user.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = REMINDER_DELIVERY_CONCURRENCY,
+        retries: int = REMINDER_DELIVERY_RETRIES,
+        shards: int = 1,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._retries = retries
+        self._unreachable: dict[str, set[int]] = {}
+        self._reached: dict[str, set[int]] = {}
+        shards = max(shards, 1)
+        self._limiters = {
+            "tg": PlatformRateLimiter(rate=TG_RATE_LIMIT / shards, chat_rate=TG_CHAT_RATE_LIMIT),
+            "max": PlatformRateLimiter(rate=MAX_RATE_LIMIT / shards, chat_rate=MAX_CHAT_RATE_LIMIT),
+        }
+
+    async def _send(self, platform: str, chat_id: int, send: Callable[[], Awaitable[None]]) -> bool:
+        limiter = self._limiters[platform]
+        for attempt in range(self._retries + 1):
+            # Wait for the rate limit outside the semaphore so a busy chat does not hold a delivery slot.
+            await limiter.acquire(chat_id)
+            async with self._semaphore:
+                try:
+                    await send()
+                    self._reached.setdefault(platform, set()).add(chat_id)
+                    return True
+                except Exception as exc:  # noqa: BLE001
+                    if _is_unreachable(exc):
+                        logger.warning(f"{platform}:{chat_id} is unreachable: {exc}")
+                        self._unreachable.setdefault(platform, set()).add(chat_id)
+                        return False
+                    retry_after = _retry_after_seconds(exc)
+                    if retry_after is None or attempt == self._retries:
+                        logger.exception(f"Failed to deliver reminder to {platform}:{chat_id}")
+                        return False
+                    logger.warning(f"{platform} flood limit hit for {chat_id}, retry in {retry_after}s")
+                    limiter.block_for(retry_after)
+        return False
+
+    async def deliver_each(self, jobs: list[tuple[str, int, Callable[[], Awaitable[None]]]]) -> list[bool]:
+        """Run (platform, chat_id, send) jobs, return whether each of them was delivered."""
+        results = await asyncio.gather(*(self._send(platform, chat_id, send) for platform, chat_id, send in jobs))
+        for limiter in self._limiters.values():
+            limiter.prune()
+        return list(results)
+
+    async def deliver(self, jobs: list[tuple[str, int, Callable[[], Awaitable[None]]]]) -> int:
+        """Run (platform, chat_id, send) jobs, return how many were delivered."""
+        return sum(await self.deliver_each(jobs))
+
+    def pop_unreachable(self) -> dict[str, list[int]]:
+        """Recipients that blocked the bot or disappeared since the last call, by platform."""
+        unreachable, self._unreachable = self._unreachable, {}
+        return {platform: sorted(chat_ids) for platform, chat_ids in unreachable.items()}
+
+    def pop_reached(self) -> dict[str, list[int]]:
+        """Recipients that received a message since the last call, by platform."""
+        reached, self._reached = self._reached, {}
+        return {platform: sorted(chat_ids) for platform, chat_ids in reached.items()}
@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+
+import telegram
+
+from config import REMINDER_CATCHUP_MINUTES, REMINDER_LEADS_MINUTES, REMINDER_RESYNC_MINUTES, REMINDER_WINDOW_HOURS, TOKEN
+from cron_handler import catch_up_start, deliver_unsent, reminders_between
+from database import session as db_session
+from database.db_controller import db_controller
+from database.lease import run_lease
+from max_bot.client import MaxApi, build_max_api
+from reminder_delivery import ReminderDispatcher
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "scheduler"
+
+
+def _current_minute() -> datetime:
+    return datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+
+class ReminderScheduler:
+    """Keeps the next REMINDER_WINDOW_HOURS of reminders in a heap and fires them minute by minute."""
+
+    def __init__(self, window_hours: int = REMINDER_WINDOW_HOURS, resync_minutes: int = REMINDER_RESYNC_MINUTES) -> None:
+        self._window = timedelta(hours=window_hours)
+        self._resync_interval = timedelta(minutes=resync_minutes)
+        self._heap: list[tuple[datetime, int, int, dict]] = []
+        self._seq = itertools.count()
+        self._loaded_until: datetime | None = None
+        self._synced_at: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def load(self, start_dt: datetime, end_dt: datetime) -> int:
+        """Push reminders whose send time falls into [start_dt, end_dt)."""
+        if end_dt <= start_dt:
+            return 0
+        async with db_session.AsyncSessionLocal() as session:
+            occurrences = await db_controller.get_events_all_users_in_range(
+                start_dt=start_dt + timedelta(minutes=min(REMINDER_LEADS_MINUTES)),
+                end_dt=end_dt + timedelta(minutes=max(REMINDER_LEADS_MINUTES)),
+                session=session,
+            )
+        items = reminders_between(occurrences, start_dt, end_dt)
+        for lead_minutes, occurrence in items:
+            remind_at = occurrence["event_dt"] - timedelta(minutes=lead_minutes)
+            heapq.heappush(self._heap, (remind_at, next(self._seq), lead_minutes, occurrence))
+        self._loaded_until = max(self._loaded_until or end_dt, end_dt)
+        return len(items)
+
+    async def refresh(self, now: datetime) -> None:
+        """Extend the window by the minutes that passed; rebuild it from scratch every resync interval."""
+        horizon = now + self._window
+        if self._synced_at is None or now - self._synced_at >= self._resync_interval:
+            self._heap = [item for item in self._heap if item[0] < now]
+            heapq.heapify(self._heap)
+            self._loaded_until = None
+            pushed = await self.load(now, horizon)
+            self._synced_at = now
+            logger.info(f"Reminder window resynced up to {horizon}: {pushed} reminders")
+        elif self._loaded_until is not None and self._loaded_until < horizon:
+            await self.load(self._loaded_until, horizon)
+
+    async def catch_up(self, now: datetime) -> int:
+        """Queue reminders of the minutes missed since the last completed tick, e.g. during a restart."""
+        missed_from = catch_up_start(await db_controller.get_reminder_checkpoint(CHECKPOINT_NAME), now)
+        if missed_from is None:
+            return 0
+        pushed = await self.load(missed_from, now)
+        logger.info(f"Catching up {pushed} reminders since {missed_from}")
+        return pushed
+
+    def pop_due(self, now: datetime) -> list[tuple[int, dict]]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, lead_minutes, occurrence = heapq.heappop(self._heap)
+            due.append((lead_minutes, occurrence))
+        return due
+
+    def push_back(self, items: list[tuple[int, dict]], now: datetime) -> None:
+        """Return undelivered reminders to the heap; ones older than REMINDER_CATCHUP_MINUTES are given up."""
+        oldest = now - timedelta(minutes=REMINDER_CATCHUP_MINUTES)
+        for lead_minutes, occurrence in items:
+            remind_at = occurrence["event_dt"] - timedelta(minutes=lead_minutes)
+            if remind_at < oldest:
+                logger.warning(f"Giving up reminder {occurrence['event_id']} at {remind_at}")
+                continue
+            heapq.heappush(self._heap, (remind_at, next(self._seq), lead_minutes, occurrence))
+
+    @staticmethod
+    async def _current(items: list[tuple[int, dict]]) -> list[tuple[int, dict]]:
+        """Re-read the occurrences of due reminders: events deleted, moved or cancelled since the window was loaded drop out."""
+        event_ids = sorted({occurrence["event_id"] for _, occurrence in items})
+        first = min(occurrence["event_dt"] for _, occurrence in items)
+        last = max(occurrence["event_dt"] for _, occurrence in items)
+        async with db_session.AsyncSessionLocal() as session:
+            fresh = await db_controller.get_events_all_users_in_range(first, last + timedelta(minutes=1), session, event_ids=event_ids)
+        by_key = {(occurrence["event_id"], occurrence["event_dt"]): occurrence for occurrence in fresh}
+        current = []
+        for lead_minutes, occurrence in items:
+            key = (occurrence["event_id"], occurrence["event_dt"])
+            if key in by_key:
+                current.append((lead_minutes, by_key[key]))
+        return current
+
+    async def fire_due(
+        self,
+        now: datetime,
+        bot: telegram.Bot,
+        max_api: MaxApi,
+        dispatcher: ReminderDispatcher,
+        reclaim_before: datetime | None = None,
+    ) -> int:
+        """Deliver the reminders due at `now`; when delivery fails they go back to the heap for the next tick."""
+        due = self.pop_due(now)
+        if not due:
+            return 0
+        try:
+            current = await self._current(due)
+            if len(current) < len(due):
+                logger.info(f"** dropped {len(due) - len(current)} reminders of changed or deleted events")
+            logger.info(f"** firing {len(current)} reminders for {now}")
+            return await deliver_unsent(current, bot, max_api, dispatcher, reclaim_before=reclaim_before)
+        except Exception:
+            # Reminders already confirmed in the ledger are skipped on the retry.
+            self.push_back(due, now)
+            raise
+
+    async def run(self) -> None:
+        bot = telegram.Bot(token=TOKEN)
+        max_api = await build_max_api()
+        dispatcher = ReminderDispatcher()
+        caught_up = False
+        try:
+            async with run_lease(CHECKPOINT_NAME) as acquired:
+                if not acquired:
+                    logger.error("Another reminder scheduler holds the lease, exiting")
+                    return
+                leased_at = datetime.now(timezone.utc)
+                while True:
+                    now = _current_minute()
+                    try:
+                        await self.refresh(now)
+                        if not caught_up:
+                            await self.catch_up(now)
+                            caught_up = True
+                        await self.fire_due(now, bot, max_api, dispatcher, reclaim_before=leased_at)
+                        await db_controller.set_reminder_checkpoint(CHECKPOINT_NAME, now)
+                    except Exception:  # noqa: BLE001
+                        logger.exception("Reminder scheduler tick failed")
+
+                    next_minute = now + timedelta(minutes=1)
+                    left = (next_minute - datetime.now(timezone.utc)).total_seconds()
+                    if left < 0:
+                        # The skipped minutes stay in the heap and fire on the next tick.
+                        logger.warning(f"Reminder tick for {now} overran the minute by {-left:.1f}s")
+                    await asyncio.sleep(max(left, 0))
+        finally:
+            await max_api.close()
+            await db_session.engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S%z", level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    asyncio.run(ReminderScheduler().run())
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import os
-from typing import AsyncGenerator
+from contextlib import contextmanager
+from typing import AsyncGenerator, Callable, ContextManager, Iterator
 
 import pytest
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 import database.db_controller as db_controller_module
 import database.session as db_session
+from database.identity_cache import identity_cache
+from database.render_cache import calendar_cache
 from database.session import Base
 
 
@@ -27,6 +31,9 @@ async def db_session_fixture(tmp_path, monkeypatch) -> AsyncGenerator[async_sess
     monkeypatch.setattr(db_controller_module, "AsyncSessionLocal", async_session, raising=False)
 
     os.environ.setdefault("TG_BOT_TOKEN", "test-token")
+    # Row ids and events versions cached against a previous test's database would point at the wrong users.
+    identity_cache.clear()
+    calendar_cache.clear()
 
     try:
         yield async_session
@@ -34,6 +41,27 @@ async def db_session_fixture(tmp_path, monkeypatch) -> AsyncGenerator[async_sess
         await engine.dispose()
 
 
+@pytest.fixture
+def capture_statements(db_session_fixture) -> Callable[[], ContextManager[list[tuple[str, tuple]]]]:
+    """Context manager collecting every `(statement, parameters)` the test engine sends while it is open."""
+
+    @contextmanager
+    def capture() -> Iterator[list[tuple[str, tuple]]]:
+        statements: list[tuple[str, tuple]] = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        sync_engine = db_session.engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", listener)
+
+    return capture
+
+
 @pytest.fixture
 def context():
     data: dict = {}
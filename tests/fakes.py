@@ -33,6 +33,19 @@ class DummyCallbackQuery:
         self.markup_edits.append({"reply_markup": reply_markup})
 
 
+@dataclass
+class DummyBot:
+    """Stands in for telegram.Bot and MaxApi in delivery tests; send_message fails while `fail` is set."""
+
+    sent: list[dict[str, Any]] = field(default_factory=list)
+    fail: bool = False
+
+    async def send_message(self, **kwargs: Any) -> None:
+        if self.fail:
+            raise RuntimeError("network down")
+        self.sent.append(kwargs)
+
+
 def make_user(user_id: int = 1, first_name: str = "Test") -> Any:
     return SimpleNamespace(id=user_id, first_name=first_name)
 
@@ -2,12 +2,17 @@ from __future__ import annotations
 
 import datetime
 from datetime import timedelta, timezone
+from zoneinfo import ZoneInfo
 
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
-from config import DEFAULT_TIMEZONE
+from config import DEFAULT_TIMEZONE, DEFAULT_TIMEZONE_NAME
 from database import session as db_session
 from database.db_controller import db_controller
+from database.models.event_models import DbEvent
+from database.models.reminder_models import ReminderQueue
 from database.models.user_model import UserRelation
 from entities import Event, Recurrent, TgUser
 
@@ -62,6 +67,85 @@ async def test_get_current_month_events_by_user_daily_cancel(db_session_fixture)
     assert event_dict[cancel_date.day] == 0
 
 
+def test_month_counts_query_expands_month_in_postgres():
+    query = db_controller._month_counts_query([DbEvent.user_id == 1], 2025, 2, DEFAULT_TIMEZONE_NAME)
+    compiled = query.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "FROM events JOIN generate_series(" in sql
+    assert "AS days(day)" in sql
+    assert "NOT (EXISTS (SELECT canceled_events.id" in sql
+    assert "event_participants" not in sql
+    assert datetime.datetime(2025, 2, 28) in compiled.params.values()
+
+
+MONTH_COUNT_ZONES = {1: "Europe/Moscow", 2: "Asia/Vladivostok", 3: "Europe/Berlin"}
+MONTH_COUNT_MONTHS = ((2024, 2), (2025, 3), (2025, 10))
+
+
+async def _seed_month_count_events() -> None:
+    for tg_id, zone in MONTH_COUNT_ZONES.items():
+        await db_controller.save_update_user(TgUser(id=tg_id, time_zone=zone))
+        events = [
+            (datetime.date(2025, 3, 10), datetime.time(9, 0), Recurrent.never),
+            (datetime.date(2024, 1, 31), datetime.time(8, 0), Recurrent.daily),
+            (datetime.date(2024, 1, 1), datetime.time(23, 30), Recurrent.weekly),
+            (datetime.date(2024, 1, 31), datetime.time(0, 30), Recurrent.monthly),
+            (datetime.date(2024, 2, 29), datetime.time(12, 0), Recurrent.annual),
+        ]
+        for event_date, start_time, recurrent in events:
+            event = Event(event_date=event_date, description=recurrent.value, start_time=start_time, tg_id=tg_id, recurrent=recurrent)
+            event_id = await db_controller.save_event(event, tz_name=zone)
+            if recurrent == Recurrent.daily:
+                await db_controller.create_cancel_event(event_id, datetime.date(2025, 3, 11))
+
+
+async def _month_counts() -> dict:
+    return {
+        (tg_id, year, month): await db_controller.get_current_month_events_by_user(user_id=tg_id, month=month, year=year, tz_name=zone)
+        for tg_id, zone in MONTH_COUNT_ZONES.items()
+        for year, month in MONTH_COUNT_MONTHS
+    }
+
+
+@pytest.mark.asyncio
+async def test_month_counts_in_postgres_match_the_python_expansion(db_session_fixture, monkeypatch):
+    """Set TEST_POSTGRES_URL (postgresql+asyncpg://...) to a scratch database to run it, its tables are dropped."""
+    import os
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    import database.db_controller as db_controller_module
+    from database.identity_cache import identity_cache
+    from database.session import Base
+
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    await _seed_month_count_events()
+    expected = await _month_counts()
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(db_session, "engine", engine)
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(db_controller_module, "AsyncSessionLocal", sessions)
+    identity_cache.clear()
+    try:
+        await _seed_month_count_events()
+        counts = await _month_counts()
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+    assert counts == expected
+
+
 @pytest.mark.asyncio
 async def test_create_cancel_event_excludes_day(db_session_fixture):
     event_date = datetime.date.today()
@@ -146,21 +230,124 @@ async def test_get_nearest_events_contains_single_event(db_session_fixture):
 
 
 @pytest.mark.asyncio
-async def test_get_current_day_events_all_users(db_session_fixture):
+async def test_get_nearest_events_skips_cancelled_day_only(db_session_fixture):
+    user_tz = ZoneInfo(DEFAULT_TIMEZONE_NAME)
+    today = datetime.datetime.now(user_tz).date()
+    event = Event(
+        event_date=today - timedelta(days=30), description="Standup", start_time=datetime.time(23, 59), tg_id=1, recurrent=Recurrent.daily
+    )
+    event_id = await db_controller.save_event(event)
+    for shift in (-20, -10, 2):
+        await db_controller.create_cancel_event(event_id=event_id, cancel_date=today + timedelta(days=shift))
+
+    events = await db_controller.get_nearest_events(user_id=1)
+    days = [list(item.keys())[0].date() for item in events]
+
+    assert today + timedelta(days=2) not in days
+    assert today + timedelta(days=1) in days and today + timedelta(days=3) in days
+
+
+@pytest.mark.asyncio
+async def test_get_day_view_matches_day_and_month_queries_in_one_statement(db_session_fixture, capture_statements):
+    # 2025-03-31 is a Monday, its week runs into April.
+    day = datetime.date(2025, 3, 31)
+    events = [
+        Event(event_date=datetime.date(2025, 3, 3), description="Standup", start_time=datetime.time(9, 0), recurrent=Recurrent.daily),
+        Event(event_date=datetime.date(2025, 3, 10), description="Review", start_time=datetime.time(18, 0), recurrent=Recurrent.weekly),
+        Event(event_date=datetime.date(2025, 1, 31), description="Rent", start_time=datetime.time(10, 0), recurrent=Recurrent.monthly),
+        Event(event_date=datetime.date(2025, 4, 2), description="Dentist", emoji="🦷", start_time=datetime.time(8, 30)),
+    ]
+    for item in events:
+        item.tg_id = 1
+    event_ids = [await db_controller.save_event(event) for event in events]
+    await db_controller.create_cancel_event(event_id=event_ids[0], cancel_date=datetime.date(2025, 4, 1))
+    await db_controller.get_user_row_id(1)  # during an update the row id comes from the identity cache
+
+    with capture_statements() as statements:
+        view = await db_controller.get_day_view(user_id=1, year=day.year, month=day.month, day=day.day, tz_name=DEFAULT_TIMEZONE_NAME)
+
+    assert len(statements) == 1
+    buttons = await db_controller.get_current_day_events_by_user(user_id=1, year=day.year, month=day.month, day=day.day, deleted=True)
+    assert [(item.button_text(), item.event_id) for item in view.events] == [(text, event_id) for text, event_id, _ in buttons]
+    month_counts = {}
+    for month in (3, 4):
+        counts = await db_controller.get_current_month_events_by_user(user_id=1, month=month, year=2025)
+        month_counts.update({datetime.date(2025, month, number): count for number, count in counts.items()})
+    assert view.week_counts == {day_date: month_counts[day_date] for day_date in view.week_counts}
+    assert list(view.week_counts.values()) == [3, 0, 2, 1, 1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_get_occurrences_counts_and_lists_any_window(db_session_fixture):
+    user_tz = ZoneInfo(DEFAULT_TIMEZONE_NAME)
+    events = [
+        Event(event_date=datetime.date(2024, 3, 20), description="Birthday", start_time=datetime.time(12, 0), recurrent=Recurrent.annual),
+        Event(event_date=datetime.date(2025, 1, 15), description="Rent", start_time=datetime.time(10, 0), recurrent=Recurrent.monthly),
+        Event(event_date=datetime.date(2025, 2, 14), description="Dinner", start_time=datetime.time(19, 0)),
+    ]
+    for item in events:
+        item.tg_id = 1
+        await db_controller.save_event(item)
+    start = datetime.datetime(2025, 1, 20, tzinfo=user_tz)
+    end = datetime.datetime(2025, 4, 1, tzinfo=user_tz)
+
+    counts = await db_controller.get_occurrences(user_id=1, start=start, end=end, mode="counts")
+    listing = await db_controller.get_occurrences(user_id=1, start=start, end=end)
+
+    assert min(counts) == start.date() and max(counts) == datetime.date(2025, 3, 31)
+    assert {day: count for day, count in counts.items() if count} == {
+        datetime.date(2025, 2, 14): 1,
+        datetime.date(2025, 2, 15): 1,
+        datetime.date(2025, 3, 15): 1,
+        datetime.date(2025, 3, 20): 1,
+    }
+    assert [(item.day, item.description) for item in listing] == [
+        (datetime.date(2025, 2, 14), "Dinner"),
+        (datetime.date(2025, 2, 15), "Rent"),
+        (datetime.date(2025, 3, 15), "Rent"),
+        (datetime.date(2025, 3, 20), "Birthday"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_due_reminders_reads_single_event(db_session_fixture):
     user_tz = timezone(timedelta(hours=DEFAULT_TIMEZONE))
-    event_date = datetime.date.today()
+    event_date = datetime.date(2025, 3, 3)
     start_time = datetime.time(14, 0)
     event = Event(event_date=event_date, description="All users", start_time=start_time, tg_id=42, recurrent=Recurrent.never)
     await db_controller.save_event(event)
 
     event_dt = datetime.datetime.combine(event_date, start_time).replace(tzinfo=user_tz).astimezone(timezone.utc)
-    event_dt = event_dt.replace(tzinfo=None)
+    await db_controller.extend_reminder_queue(event_dt - timedelta(hours=1))
 
     async with db_session.AsyncSessionLocal() as session:
-        events = await db_controller.get_current_day_events_all_users(event_dt=event_dt, session=session)
+        events, cursor = await db_controller.get_due_reminders(event_dt, (0,), session)
 
-    assert events
-    assert events[0]["tg_id"] == 42
+    assert [(lead, item["tg_id"], item["event_dt"]) for lead, item in events] == [(0, 42, event_dt)]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_due_reminders_keyset_pages(db_session_fixture):
+    event_date = datetime.date(2025, 3, 3)
+    for index in range(5):
+        start_time = datetime.time(9, 0)
+        event = Event(event_date=event_date, description=f"Daily {index}", start_time=start_time, tg_id=42, recurrent=Recurrent.daily)
+        await db_controller.save_event(event)
+
+    event_dt = datetime.datetime(2025, 3, 10, 6, 0, tzinfo=timezone.utc)
+    await db_controller.extend_reminder_queue(event_dt - timedelta(hours=1))
+    seen = []
+    cursor = None
+    async with db_session.AsyncSessionLocal() as session:
+        while True:
+            events, cursor = await db_controller.get_due_reminders(event_dt, (0,), session, limit=2, after=cursor)
+            seen += [item["event_id"] for _, item in events]
+            if cursor is None:
+                break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 5
 
 
 @pytest.mark.asyncio
@@ -183,6 +370,37 @@ async def test_save_update_user_creates_relation(db_session_fixture):
     assert result
 
 
+@pytest.mark.asyncio
+async def test_save_update_user_skips_unchanged_profile(db_session_fixture, capture_statements):
+    from sqlalchemy import update
+
+    from database.identity_cache import bind_request_user, reset_request_user
+    from database.models.user_model import User as DB_User
+
+    await db_controller.save_update_user(TgUser(id=1, first_name="Alice", language_code="en"))
+    token = bind_request_user("tg", 1, await db_controller.load_request_user(1, platform="tg"))
+    try:
+        with capture_statements() as statements:
+            saved = await db_controller.save_update_user(TgUser(id=1, first_name="Alice"))
+            unchanged = len(statements)
+            renamed = await db_controller.save_update_user(TgUser(id=1, first_name="Alicia"))
+    finally:
+        reset_request_user(token)
+
+    assert unchanged == 0
+    assert (saved.tg_id, saved.language_code, saved.time_zone) == (1, "en", DEFAULT_TIMEZONE_NAME)
+    assert len(statements) == 1 and "ON CONFLICT" in statements[0][0]
+    assert renamed.first_name == "Alicia"
+    assert (await db_controller.get_user(1)).first_name == "Alicia"
+
+    # A reminder worker counted failures behind the cached snapshot: outside a bound update the profile is always written.
+    async with db_session.AsyncSessionLocal() as session:
+        await session.execute(update(DB_User).where(DB_User.tg_id == 1).values(tg_delivery_failures=3))
+        await session.commit()
+    await db_controller.save_update_user(TgUser(id=1, first_name="Alicia"))
+    assert (await db_controller.load_request_user(1, platform="tg")).profile["tg_delivery_failures"] == 0
+
+
 @pytest.mark.asyncio
 async def test_notes_crud(db_session_fixture):
     user = TgUser.model_validate(type("U", (), {"id": 1, "first_name": "Alice"})())
@@ -207,3 +425,279 @@ async def test_notes_crud(db_session_fixture):
     deleted = await db_controller.delete_note(note_id=note.id, user_id=user_row_id)
     assert deleted is True
     assert await db_controller.get_note_by_id(note_id=note.id, user_id=user_row_id) is None
+
+
+@pytest.mark.asyncio
+async def test_get_events_all_users_in_range_expands_recurring(db_session_fixture):
+    event_date = datetime.date(2025, 3, 3)
+    daily = Event(event_date=event_date, description="Daily", start_time=datetime.time(9, 0), tg_id=7, recurrent=Recurrent.daily)
+    weekly = Event(event_date=event_date, description="Weekly", start_time=datetime.time(10, 30), tg_id=7, recurrent=Recurrent.weekly)
+    daily_id = await db_controller.save_event(daily)
+    await db_controller.save_event(weekly)
+    await db_controller.create_cancel_event(event_id=daily_id, cancel_date=datetime.date(2025, 3, 11))
+
+    start_dt = datetime.datetime(2025, 3, 10, 0, 0, tzinfo=timezone.utc)
+    end_dt = start_dt + timedelta(days=2)
+    async with db_session.AsyncSessionLocal() as session:
+        events = await db_controller.get_events_all_users_in_range(start_dt=start_dt, end_dt=end_dt, session=session)
+
+    assert [(item["description"], item["event_dt"]) for item in events] == [
+        ("Daily", datetime.datetime(2025, 3, 10, 6, 0, tzinfo=timezone.utc)),
+        ("Weekly", datetime.datetime(2025, 3, 10, 7, 30, tzinfo=timezone.utc)),
+    ]
+    assert events[0]["tg_id"] == 7
+    assert events[0]["start_time"] == datetime.time(9, 0)
+
+
+@pytest.mark.asyncio
+async def test_get_due_reminders_returns_both_platform_ids(db_session_fixture):
+    await db_controller.link_tg_max(tg_id=42, max_id=4242)
+    await db_controller.set_user_language(user_id=42, language_code="en", platform="tg")
+    event_date = datetime.date(2025, 3, 3)
+    event = Event(event_date=event_date, description="Linked", start_time=datetime.time(9, 0), tg_id=42, recurrent=Recurrent.daily)
+    await db_controller.save_event(event)
+
+    event_dt = datetime.datetime(2025, 3, 10, 6, 0, tzinfo=timezone.utc)
+    await db_controller.extend_reminder_queue(event_dt - timedelta(hours=1))
+    async with db_session.AsyncSessionLocal() as session:
+        events, _ = await db_controller.get_due_reminders(event_dt, (0,), session)
+
+    assert len(events) == 1
+    _, event = events[0]
+    assert (event["tg_id"], event["max_id"], event["language_code"]) == (42, 4242, "en")
+    assert event["start_time"] == datetime.time(9, 0)
+
+
+@pytest.mark.asyncio
+async def test_reminder_ledger_and_checkpoint(db_session_fixture):
+    event_id = await db_controller.save_event(
+        Event(event_date=datetime.date(2025, 3, 3), description="Ledger", start_time=datetime.time(12, 0), tg_id=1)
+    )
+    occurrence = datetime.datetime(2025, 3, 3, 9, 0, tzinfo=datetime.timezone.utc)
+
+    claimed = await db_controller.claim_reminders([(event_id, occurrence, 0), (event_id, occurrence, 60), (event_id, occurrence, 0)])
+    assert claimed == {(event_id, occurrence, 0), (event_id, occurrence, 60)}
+    assert await db_controller.claim_reminders([(event_id, occurrence, 0)]) == set()
+
+    assert await db_controller.get_reminder_checkpoint("cron_lead_0") is None
+    await db_controller.set_reminder_checkpoint("cron_lead_0", occurrence)
+    await db_controller.set_reminder_checkpoint("cron_lead_0", occurrence + datetime.timedelta(minutes=1))
+    assert await db_controller.get_reminder_checkpoint("cron_lead_0") == occurrence + datetime.timedelta(minutes=1)
+
+    assert await db_controller.prune_sent_reminders(before=occurrence + datetime.timedelta(days=1)) == 2
+    assert await db_controller.claim_reminders([(event_id, occurrence, 0)]) == {(event_id, occurrence, 0)}
+
+
+@pytest.mark.asyncio
+async def test_reminder_queue_follows_event_changes(db_session_fixture):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    tomorrow = (now + datetime.timedelta(days=1)).astimezone(ZoneInfo(DEFAULT_TIMEZONE_NAME))
+    event = Event(event_date=tomorrow.date(), description="Queued", start_time=tomorrow.time(), tg_id=7)
+    event_id = await db_controller.save_event(event)
+
+    async def queued() -> list:
+        query = (
+            select(ReminderQueue.event_id, ReminderQueue.fire_at, DbEvent.description)
+            .join(DbEvent, DbEvent.id == ReminderQueue.event_id)
+            .order_by(ReminderQueue.fire_at)
+        )
+        async with db_session.AsyncSessionLocal() as session:
+            rows = (await session.execute(query)).all()
+        return [(event_id, fire_at.replace(tzinfo=timezone.utc), description) for event_id, fire_at, description in rows]
+
+    assert await queued() == []
+    assert await db_controller.extend_reminder_queue(now) == 1
+    assert await db_controller.extend_reminder_queue(now) == 0
+    fire_at = now + datetime.timedelta(days=1)
+    assert await queued() == [(event_id, fire_at, "Queued")]
+
+    moved = tomorrow + datetime.timedelta(hours=2)
+    moved_event = event.model_copy(update={"event_date": moved.date(), "start_time": moved.time(), "description": "Moved"})
+    await db_controller.update_event(event_id, moved_event)
+    assert await queued() == [(event_id, fire_at + datetime.timedelta(hours=2), "Moved")]
+
+    shifted_id = await db_controller.reschedule_event(event_id, shift_hours=1)
+    await db_controller.create_cancel_event(event_id, (fire_at + datetime.timedelta(hours=2)).date())
+    assert await queued() == [(shifted_id, fire_at + datetime.timedelta(hours=3), "Moved")]
+
+    await db_controller.delete_event_by_id(shifted_id)
+    assert await queued() == []
+
+
+@pytest.mark.asyncio
+async def test_event_writes_cover_the_window_an_extension_materializes(db_session_fixture):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    # The queue was last materialized 30 hours ago, up to now + 18h; the next extension will add [now + 18h, now + 48h).
+    await db_controller.extend_reminder_queue(now - datetime.timedelta(hours=30))
+    fire_at = now + datetime.timedelta(hours=20)
+    local = fire_at.astimezone(ZoneInfo(DEFAULT_TIMEZONE_NAME))
+    event_id = await db_controller.save_event(Event(event_date=local.date(), description="Late", start_time=local.time(), tg_id=7))
+
+    async def queued() -> list:
+        async with db_session.AsyncSessionLocal() as session:
+            rows = (await session.execute(select(ReminderQueue.event_id, ReminderQueue.fire_at))).all()
+        return [(row_id, value.replace(tzinfo=timezone.utc)) for row_id, value in rows]
+
+    # An extension whose snapshot was taken before the write would miss it, the writer queued it already.
+    assert await queued() == [(event_id, fire_at)]
+    await db_controller.extend_reminder_queue(now)
+    assert await queued() == [(event_id, fire_at)]
+
+
+@pytest.mark.asyncio
+async def test_reminder_rows_skip_cancellations_on_the_owners_local_date(db_session_fixture):
+    await db_controller.save_update_user(TgUser(id=1, time_zone="Asia/Vladivostok"))
+    event = Event(event_date=datetime.date(2025, 3, 1), description="Gym", start_time=datetime.time(8, 0), tg_id=1)
+    event_id = await db_controller.save_event(event.model_copy(update={"recurrent": Recurrent.daily}), tz_name="Asia/Vladivostok")
+    await db_controller.create_cancel_event(event_id, datetime.date(2025, 3, 11))
+
+    start = datetime.datetime(2025, 3, 10, tzinfo=timezone.utc)
+    # 22:00 UTC on the 10th is 08:00 on the cancelled 11th in Vladivostok.
+    await db_controller.extend_reminder_queue(start)
+    async with db_session.AsyncSessionLocal() as session:
+        rows = await db_controller.get_events_all_users_in_range(start, start + timedelta(days=3), session)
+        due, _ = await db_controller.get_due_reminders(datetime.datetime(2025, 3, 10, 22, 0, tzinfo=timezone.utc), (0,), session)
+
+    local_days = [row["event_dt"].astimezone(ZoneInfo("Asia/Vladivostok")).date().day for row in rows]
+    assert local_days == [12, 13]
+    assert due == []
+
+
+@pytest.mark.asyncio
+async def test_reminders_fire_at_the_calendar_time_across_dst(db_session_fixture):
+    # New York moves its clocks forward on 2025-03-09: 09:00 there is 14:00 UTC before and 13:00 UTC after.
+    zone = ZoneInfo("America/New_York")
+    await db_controller.save_update_user(TgUser(id=1, time_zone="America/New_York"))
+    for start_time, recurrent in ((datetime.time(9, 0), Recurrent.daily), (datetime.time(18, 30), Recurrent.weekly)):
+        event = Event(event_date=datetime.date(2025, 3, 3), description="Standup", start_time=start_time, tg_id=1, recurrent=recurrent)
+        await db_controller.save_event(event, tz_name="America/New_York")
+
+    start, end = datetime.datetime(2025, 3, 1, tzinfo=zone), datetime.datetime(2025, 3, 20, tzinfo=zone)
+    calendar = await db_controller.get_occurrences(1, start, end, tz_name="America/New_York")
+    after_change = datetime.datetime(2025, 3, 12, 13, 0, tzinfo=timezone.utc)
+    await db_controller.extend_reminder_queue(after_change - timedelta(hours=1))
+    async with db_session.AsyncSessionLocal() as session:
+        reminders = await db_controller.get_events_all_users_in_range(start, end, session)
+        due, _ = await db_controller.get_due_reminders(after_change, (0,), session)
+
+    assert len(calendar) == 20
+    assert {item.start_time for item in calendar} == {datetime.time(9, 0), datetime.time(18, 30)}
+    assert [(row["event_id"], row["event_dt"]) for row in reminders] == [
+        (item.event_id, datetime.datetime.combine(item.day, item.start_time, tzinfo=zone)) for item in calendar
+    ]
+    assert [(row["event_dt"], row["start_time"]) for _, row in due] == [(after_change, datetime.time(9, 0))]
+
+
+@pytest.mark.asyncio
+async def test_event_write_rolls_back_when_requeue_fails(db_session_fixture, monkeypatch):
+    from database.db_controller import DBController
+
+    event = Event(event_date=datetime.date(2025, 3, 3), description="Atomic", start_time=datetime.time(9, 0), tg_id=1)
+    event_id = await db_controller.save_event(event)
+
+    async def broken_requeue(event_ids, session):
+        raise RuntimeError("queue write failed")
+
+    monkeypatch.setattr(DBController, "_requeue_events", staticmethod(broken_requeue))
+    with pytest.raises(RuntimeError):
+        await db_controller.save_event(event.model_copy(update={"description": "Lost"}))
+    with pytest.raises(RuntimeError):
+        await db_controller.reschedule_event(event_id, shift_days=1)
+    with pytest.raises(RuntimeError):
+        await db_controller.resave_event_to_participant(event_id, user_id=2)
+
+    async with db_session.AsyncSessionLocal() as session:
+        descriptions = (await session.execute(select(DbEvent.description))).scalars().all()
+    assert descriptions == ["Atomic"]
+    assert await db_controller.get_events_version(1) == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_reads_skip_rows_changed_behind_the_bot(db_session_fixture):
+    from sqlalchemy import update
+
+    from database.models.event_models import CanceledEvent
+
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    tomorrow = (now + datetime.timedelta(days=1)).astimezone(ZoneInfo(DEFAULT_TIMEZONE_NAME))
+    ids = [
+        await db_controller.save_event(Event(event_date=tomorrow.date(), description=name, start_time=tomorrow.time(), tg_id=7))
+        for name in ("Kept", "Cancelled", "Moved")
+    ]
+    assert await db_controller.extend_reminder_queue(now) == 3
+
+    # The api/ service cancels and moves events with plain writes that leave reminder_queue as it was.
+    async with db_session.AsyncSessionLocal() as session:
+        session.add(CanceledEvent(event_id=ids[1], cancel_date=tomorrow.date()))
+        moved_at = now + datetime.timedelta(days=1, hours=1)
+        await session.execute(update(DbEvent).where(DbEvent.id == ids[2]).values(start_at=moved_at, start_time=moved_at.time()))
+        await session.commit()
+
+    async with db_session.AsyncSessionLocal() as session:
+        due, _ = await db_controller.get_due_reminders(now + datetime.timedelta(days=1), (0,), session)
+    assert [(lead, row["event_id"], row["description"]) for lead, row in due] == [(0, ids[0], "Kept")]
+
+
+@pytest.mark.asyncio
+async def test_get_due_reminders_returns_every_lead_in_one_pass(db_session_fixture):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    local_tz = ZoneInfo(DEFAULT_TIMEZONE_NAME)
+    ids = {}
+    for lead in (0, 15, 60, 1440):
+        start = (now + datetime.timedelta(minutes=lead)).astimezone(local_tz)
+        ids[lead] = await db_controller.save_event(
+            Event(event_date=start.date(), description=f"lead {lead}", start_time=start.time(), tg_id=1)
+        )
+    await db_controller.extend_reminder_queue(now)
+
+    async with db_session.AsyncSessionLocal() as session:
+        first, cursor = await db_controller.get_due_reminders(now, (0, 15, 60, 1440), session, limit=3)
+        rest, last = await db_controller.get_due_reminders(now, (0, 15, 60, 1440), session, limit=3, after=cursor)
+        only_hour, _ = await db_controller.get_due_reminders(now, (60,), session)
+
+    assert last is None
+    assert [(lead, row["event_id"]) for lead, row in first + rest] == [(lead, ids[lead]) for lead in (0, 15, 60, 1440)]
+    assert [(lead, row["event_id"]) for lead, row in only_hour] == [(60, ids[60])]
+
+
+@pytest.mark.asyncio
+async def test_due_reminders_shards_partition_recipients(db_session_fixture):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+    start = (now + datetime.timedelta(minutes=60)).astimezone(ZoneInfo(DEFAULT_TIMEZONE_NAME))
+    for tg_id in range(1, 6):
+        await db_controller.save_event(Event(event_date=start.date(), description="Shard", start_time=start.time(), tg_id=tg_id))
+    await db_controller.extend_reminder_queue(now)
+
+    async with db_session.AsyncSessionLocal() as session:
+        everyone, _ = await db_controller.get_due_reminders(now, (60,), session)
+        shards = [(await db_controller.get_due_reminders(now, (60,), session, shard=(index, 3)))[0] for index in range(3)]
+
+    assert len(everyone) == 5
+    assert all(row["user_id"] % 3 == index for index, rows in enumerate(shards) for _, row in rows)
+    assert sorted(row["tg_id"] for rows in shards for _, row in rows) == sorted(row["tg_id"] for _, row in everyone)
+
+
+@pytest.mark.asyncio
+async def test_reminders_skip_recipients_that_keep_failing(db_session_fixture, monkeypatch):
+    monkeypatch.setattr("config.REMINDER_FAILURE_LIMIT", 2)
+    event_date = datetime.date(2025, 3, 3)
+    await db_controller.save_event(Event(event_date=event_date, description="Blocked", start_time=datetime.time(12, 0), tg_id=1))
+    await db_controller.link_tg_max(tg_id=1, max_id=2)
+    event_dt = datetime.datetime(2025, 3, 3, 9, 0, tzinfo=datetime.timezone.utc)
+    await db_controller.extend_reminder_queue(event_dt - datetime.timedelta(hours=1))
+
+    async def recipients() -> list[tuple]:
+        async with db_session.AsyncSessionLocal() as session:
+            events, _ = await db_controller.get_due_reminders(event_dt, (0,), session)
+        return [(event["tg_id"], event["max_id"]) for _, event in events]
+
+    await db_controller.record_delivery_failures([1], platform="tg")
+    assert await recipients() == [(1, 2)]
+    await db_controller.record_delivery_failures([1], platform="tg")
+    assert await recipients() == [(None, 2)]
+    await db_controller.record_delivery_failures([2], platform="max")
+    await db_controller.record_delivery_failures([2], platform="max")
+    assert await recipients() == []
+
+    await db_controller.save_update_user(TgUser(id=1, first_name="Back"))
+    assert await recipients() == [(1, None)]
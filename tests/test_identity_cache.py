@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from database.db_controller import db_controller
+from database.identity_cache import CachedUser, IdentityCache, bind_request_user, identity_cache, request_user, reset_request_user
+from entities import MaxUser, TgUser
+from i18n import resolve_user_locale
+
+
+def test_identity_cache_is_bounded_lru_with_counters():
+    cache = IdentityCache(maxsize=2, ttl=60)
+    cache.put("tg", 1, CachedUser(row_id=10))
+    cache.put("tg", 2, CachedUser(row_id=20))
+    assert cache.get("tg", 1).row_id == 10
+
+    cache.put("max", 3, CachedUser(row_id=30))
+
+    assert cache.get("tg", 2) is None  # least recently used entry was evicted
+    assert cache.get("max", 3).row_id == 30
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_identity_cache_entries_expire():
+    cache = IdentityCache(maxsize=10, ttl=-1)
+    cache.put("tg", 1, CachedUser(row_id=10))
+
+    assert cache.get("tg", 1) is None
+    assert len(cache) == 0
+
+
+async def test_row_id_resolution_is_served_from_cache(db_session_fixture):
+    await db_controller.save_update_user(TgUser(id=1, first_name="Ann"))
+    cached = identity_cache.get("tg", 1)
+    assert cached is not None and cached.profile["first_name"] == "Ann"
+
+    hits = identity_cache.hits
+    row_id = await db_controller.get_user_row_id(1, platform="tg")
+    await db_controller.get_current_month_events_by_user(user_id=1, month=3, year=2025)
+
+    assert row_id == cached.row_id
+    assert identity_cache.hits == hits + 2
+    assert await db_controller.get_user_row_id(404, platform="tg") is None
+    assert identity_cache.get("tg", 404) is None
+
+
+async def test_link_tg_max_invalidates_merged_ids(db_session_fixture):
+    await db_controller.save_update_user(TgUser(id=1))
+    await db_controller.save_update_max_user(MaxUser(id=2))
+    tg_row = await db_controller.get_user_row_id(1, platform="tg")
+    assert await db_controller.get_user_row_id(2, platform="max") != tg_row
+
+    linked, _ = await db_controller.link_tg_max(tg_id=1, max_id=2)
+
+    assert linked is True
+    assert await db_controller.get_user_row_id(2, platform="max") == tg_row
+
+
+async def test_bound_request_user_answers_lookups_without_queries(db_session_fixture, capture_statements):
+    await db_controller.save_update_user(TgUser(id=1, first_name="Ann", language_code="en", city="Kazan"))
+    identity_cache.clear()
+    token = bind_request_user("tg", 1, await db_controller.load_request_user(1, platform="tg"))
+    try:
+        with capture_statements() as statements:
+            user = await db_controller.get_user(1, platform="tg")
+            locale = await resolve_user_locale(1, platform="tg")
+            row_id = await db_controller.get_user_row_id(1, platform="tg")
+            await db_controller.save_update_user(TgUser(id=1, first_name="Ann"))
+            assert statements == []
+
+            await db_controller.set_user_language(1, "ru", platform="tg")
+            assert request_user("tg", 1) is None
+            assert await resolve_user_locale(1, platform="tg") == "ru"
+    finally:
+        reset_request_user(token)
+
+    assert (user.first_name, user.city, locale) == ("Ann", "Kazan", "en")
+    assert row_id is not None
+
+
+async def test_bind_update_user_middleware(db_session_fixture):
+    from main import bind_update_user
+
+    await db_controller.save_update_user(TgUser(id=1, first_name="Ann"))
+    await bind_update_user(SimpleNamespace(effective_user=SimpleNamespace(id=1)), None)
+    assert request_user("tg", 1).profile["first_name"] == "Ann"
+
+
+async def test_request_user_is_reset_after_each_update(monkeypatch):
+    from telegram.ext import Application, ApplicationBuilder
+
+    from main import RequestUserApplication
+
+    async def failing_handlers(self, update):
+        bind_request_user("tg", 1, CachedUser(row_id=10))
+        raise RuntimeError("handler failed")
+
+    monkeypatch.setattr(Application, "process_update", failing_handlers)
+    application = ApplicationBuilder().application_class(RequestUserApplication).token("1:test").build()
+
+    with pytest.raises(RuntimeError):
+        await application.process_update(SimpleNamespace(effective_user=SimpleNamespace(id=1)))
+    assert request_user("tg", 1) is None
+
+
+def test_cache_stats_are_logged_at_most_once_per_interval(monkeypatch, caplog):
+    import database.cache_stats as cache_stats
+
+    identity_cache.clear()
+    identity_cache.put("tg", 1, CachedUser(row_id=10))
+    identity_cache.get("tg", 1)
+    identity_cache.get("tg", 2)
+    monkeypatch.setattr(cache_stats, "CACHE_STATS_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(cache_stats, "_last_logged", 0.0)
+
+    with caplog.at_level("INFO", logger="database.cache_stats"):
+        cache_stats.log_cache_stats()
+        cache_stats.log_cache_stats()
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "identity cache: 50.0% hits of 2 lookups, 1 entries",
+        "calendar cache: 0.0% hits of 0 lookups, 0 entries",
+    ]
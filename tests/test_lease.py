@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import pytest
+
+from database.lease import run_lease
+
+
+@pytest.mark.asyncio
+async def test_run_lease_is_exclusive_until_released(db_session_fixture):
+    async with run_lease("test_cron") as first:
+        assert first is True
+        async with run_lease("test_cron") as second:
+            assert second is False
+        async with run_lease("test_other") as other:
+            assert other is True
+
+    async with run_lease("test_cron") as again:
+        assert again is True
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import datetime
+from datetime import timedelta, timezone
+
+from sqlalchemy import text
+
+from database import session as db_session
+from database.db_controller import db_controller
+from database.models.event_models import DbEvent
+from database.models.user_model import User as DB_User
+
+EVENT_DT = datetime.datetime(2025, 3, 10, 6, 0, tzinfo=timezone.utc)
+
+
+async def _populate(users: int = 50, events_per_user: int = 20) -> None:
+    """Fill the events table with a mix of recurrence kinds and refresh planner statistics."""
+    async with db_session.AsyncSessionLocal() as session:
+        session.add_all(DB_User(tg_id=tg_id, time_zone="Europe/Moscow") for tg_id in range(1, users + 1))
+        await session.flush()
+        rows = (await session.execute(text("SELECT id FROM tg_users"))).scalars().all()
+        for user_id in rows:
+            for number in range(events_per_user):
+                start_at = EVENT_DT - timedelta(days=number, minutes=15 * number)
+                kind = number % 5
+                session.add(
+                    DbEvent(
+                        description=f"Event {number}",
+                        start_time=start_at.time(),
+                        start_at=start_at,
+                        single_event=kind == 0,
+                        daily=kind == 1,
+                        weekly=start_at.weekday() if kind == 2 else None,
+                        monthly=start_at.day if kind == 3 else None,
+                        annual_day=start_at.day if kind == 4 else None,
+                        annual_month=start_at.month if kind == 4 else None,
+                        user_id=user_id,
+                    )
+                )
+        await session.commit()
+        await session.execute(text("ANALYZE"))
+
+
+async def _query_plans(capture_statements, action) -> list[str]:
+    """Run `action` and return the SQLite plan of every SELECT it sent."""
+    with capture_statements() as captured:
+        await action()
+    statements = [item for item in captured if item[0].lstrip().upper().startswith("SELECT")]
+
+    plans = []
+    async with db_session.engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            plans.append(" | ".join(row[-1] for row in rows))
+    return plans
+
+
+def _plans_for(plans: list[str], table: str) -> list[str]:
+    """Plans whose outer loop reads `table`."""
+    return [plan for plan in plans if plan.split(" ")[1] == table]
+
+
+async def test_calendar_queries_search_by_owner_and_start(db_session_fixture, capture_statements):
+    await _populate()
+
+    async def calendar() -> None:
+        await db_controller.get_current_month_events_by_user(user_id=1, month=EVENT_DT.month, year=EVENT_DT.year)
+        await db_controller.get_current_day_events_by_user(user_id=1, month=EVENT_DT.month, year=EVENT_DT.year, day=EVENT_DT.day)
+        await db_controller.get_nearest_events(user_id=1)
+
+    plans = await _query_plans(capture_statements, calendar)
+    event_plans = _plans_for(plans, "events")
+
+    assert len(event_plans) == 3
+    assert all(plan.startswith("SEARCH events USING INDEX ix_events_user_start_at") for plan in event_plans), plans
+
+
+async def test_due_reminders_search_the_queue_by_fire_at(db_session_fixture, capture_statements):
+    await _populate()
+    await db_controller.extend_reminder_queue(EVENT_DT - timedelta(hours=1))
+    due = []
+
+    async def reminders() -> None:
+        async with db_session.AsyncSessionLocal() as session:
+            due.extend((await db_controller.get_due_reminders(EVENT_DT, (0, 60), session))[0])
+
+    plans = await _query_plans(capture_statements, reminders)
+    queue_plans = _plans_for(plans, "reminder_queue")
+
+    assert due
+    assert len(queue_plans) == 1
+    assert queue_plans[0].startswith("SEARCH reminder_queue USING INDEX ix_reminder_queue_fire_at (fire_at=?)"), plans
+    assert not any("SCAN" in plan for plan in plans), plans
+
+
+async def test_reminder_range_scans_search_by_start_time(db_session_fixture, capture_statements):
+    await _populate()
+
+    async def reminders() -> None:
+        async with db_session.AsyncSessionLocal() as session:
+            await db_controller.get_events_all_users_in_range(EVENT_DT, EVENT_DT + timedelta(hours=1), session)
+
+    plans = await _query_plans(capture_statements, reminders)
+    event_plans = _plans_for(plans, "events")
+
+    assert len(event_plans) == 1
+    assert event_plans[0].startswith("SEARCH events USING INDEX ix_events_start_time"), plans
+    assert not any("SCAN events" in plan for plan in plans), plans
+
+
+async def test_cancellations_are_read_by_event_and_window(db_session_fixture, capture_statements):
+    await _populate()
+
+    async def queries() -> None:
+        await db_controller.get_current_month_events_by_user(user_id=1, month=EVENT_DT.month, year=EVENT_DT.year)
+        await db_controller.get_nearest_events(user_id=1)
+        async with db_session.AsyncSessionLocal() as session:
+            await db_controller.get_events_all_users_in_range(EVENT_DT, EVENT_DT + timedelta(hours=1), session)
+
+    # Cancellations are read by a separate query or outer-joined to the events, either way through the index.
+    cancel_plans = [plan for plan in await _query_plans(capture_statements, queries) if "canceled_events" in plan]
+
+    assert len(cancel_plans) == 3
+    assert all(
+        "SEARCH canceled_events USING COVERING INDEX ix_canceled_events_event_date (event_id=? AND cancel_date>" in plan
+        and "SCAN canceled_events" not in plan
+        for plan in cancel_plans
+    ), cancel_plans
+
+
+async def test_calendar_and_reminder_reads_skip_relationship_loads(db_session_fixture, capture_statements):
+    await _populate(users=2, events_per_user=5)
+    async with db_session.AsyncSessionLocal() as session:
+        event_id = (await session.execute(text("SELECT id FROM events ORDER BY id LIMIT 1"))).scalar_one()
+
+    async def reads() -> None:
+        await db_controller.get_current_month_events_by_user(user_id=1, month=EVENT_DT.month, year=EVENT_DT.year)
+        await db_controller.get_current_day_events_by_user(user_id=1, month=EVENT_DT.month, year=EVENT_DT.year, day=EVENT_DT.day)
+        await db_controller.get_nearest_events(user_id=1)
+        await db_controller.extend_reminder_queue(EVENT_DT)
+        async with db_session.AsyncSessionLocal() as session:
+            await db_controller.get_due_reminders(EVENT_DT, (0,), session)
+        await db_controller.delete_event_by_id(event_id)
+
+    with capture_statements() as captured:
+        await reads()
+    statements = [statement for statement, _ in captured]
+
+    assert not any("event_participants" in statement for statement in statements)
+    cancellation_reads = [statement for statement in statements if "FROM canceled_events" in statement]
+    assert cancellation_reads and all("cancel_date BETWEEN" in statement for statement in cancellation_reads)
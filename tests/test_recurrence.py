@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import datetime
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+from database import recurrence
+from database.models.event_models import CanceledEvent, DbEvent
+from database.recurrence import expand_occurrences, expand_occurrences_batch
+
+UTC = timezone.utc
+
+
+def _event(start_at: datetime.datetime, cancel_dates: tuple[datetime.date, ...] = (), **recurrence) -> DbEvent:
+    return DbEvent(
+        description="Event",
+        start_at=start_at,
+        start_time=start_at.time(),
+        canceled_events=[CanceledEvent(cancel_date=cancel_date) for cancel_date in cancel_dates],
+        **recurrence,
+    )
+
+
+def _expand(event: DbEvent, start: datetime.datetime, end: datetime.datetime, tz=UTC) -> list[datetime.datetime]:
+    return [occurrence for _, occurrence in expand_occurrences([event], start, end, tz)]
+
+
+def test_expand_occurrences_steps_by_period():
+    start = datetime.datetime(2025, 1, 1, tzinfo=UTC)
+    end = datetime.datetime(2025, 4, 1, tzinfo=UTC)
+
+    weekly = _event(datetime.datetime(2025, 1, 6, 9, 0, tzinfo=UTC), weekly=0)
+    monthly = _event(datetime.datetime(2025, 1, 31, 9, 0, tzinfo=UTC), monthly=31)
+    annual = _event(datetime.datetime(2024, 2, 29, 9, 0, tzinfo=UTC), annual_day=29, annual_month=2)
+
+    assert len(_expand(weekly, start, end)) == 13
+    assert [item.date() for item in _expand(monthly, start, end)] == [
+        datetime.date(2025, 1, 31),
+        datetime.date(2025, 2, 28),
+        datetime.date(2025, 3, 31),
+    ]
+    assert _expand(annual, start, end) == []
+
+
+def test_expand_occurrences_skips_cancellations_and_window_edges():
+    event = _event(
+        datetime.datetime(2025, 3, 1, 8, 0, tzinfo=UTC),
+        cancel_dates=(datetime.date(2025, 3, 3),),
+        daily=True,
+    )
+
+    occurrences = _expand(event, datetime.datetime(2025, 3, 2, 8, 0, tzinfo=UTC), datetime.datetime(2025, 3, 5, 8, 0, tzinfo=UTC))
+
+    assert occurrences == [datetime.datetime(2025, 3, 2, 8, 0, tzinfo=UTC), datetime.datetime(2025, 3, 4, 8, 0, tzinfo=UTC)]
+
+
+def test_expand_occurrences_follows_local_calendar():
+    # 22:30 UTC on Sunday is 01:30 on Monday in Moscow.
+    event = _event(datetime.datetime(2025, 3, 2, 22, 30, tzinfo=UTC), weekly=6)
+    user_tz = ZoneInfo("Europe/Moscow")
+
+    occurrences = _expand(event, datetime.datetime(2025, 3, 1, tzinfo=user_tz), datetime.datetime(2025, 3, 15, tzinfo=user_tz), user_tz)
+
+    assert [item.weekday() for item in occurrences] == [0, 0]
+    assert all(item.time() == datetime.time(1, 30) for item in occurrences)
+
+
+def _mixed_events() -> list[DbEvent]:
+    start_at = datetime.datetime(2024, 1, 31, 23, 45, tzinfo=UTC)
+    return [
+        _event(start_at, single_event=True),
+        _event(datetime.datetime(2025, 2, 27, 6, 0, tzinfo=UTC), single_event=True),
+        _event(start_at, cancel_dates=(datetime.date(2025, 2, 28),), daily=True),
+        _event(start_at, weekly=start_at.weekday()),
+        _event(start_at, monthly=31),
+        _event(datetime.datetime(2024, 2, 28, 10, 0, tzinfo=UTC), annual_day=28, annual_month=2),
+        _event(datetime.datetime(2025, 3, 5, 10, 0, tzinfo=UTC), daily=True),
+    ]
+
+
+def test_expand_occurrences_batch_matches_expand_occurrences():
+    events = _mixed_events()
+    start = datetime.datetime(2025, 2, 26, 12, 30, tzinfo=UTC)
+    end = datetime.datetime(2025, 3, 3, 23, 46, tzinfo=UTC)
+
+    expected = sorted((occurrence, id(event)) for event, occurrence in expand_occurrences(events, start, end, UTC))
+    batch = sorted((occurrence, id(event)) for event, occurrence in expand_occurrences_batch(events, start, end))
+
+    assert batch == expected
+    assert len(batch) == 9
+
+
+def test_expand_occurrences_batch_matches_cancellations_on_local_dates():
+    # 08:00 in Vladivostok is 22:00 UTC on the previous day.
+    vladivostok = ZoneInfo("Asia/Vladivostok")
+    event = _event(datetime.datetime(2025, 3, 1, 22, 0, tzinfo=UTC), daily=True)
+    event.id = 1
+    start = datetime.datetime(2025, 3, 10, tzinfo=UTC)
+    end = datetime.datetime(2025, 3, 13, tzinfo=UTC)
+
+    occurrences = expand_occurrences_batch([event], start, end, {1: {datetime.date(2025, 3, 11)}}, lambda _: vladivostok)
+
+    assert [occurrence.astimezone(vladivostok).date().day for _, occurrence in occurrences] == [12, 13]
+
+
+def test_expand_occurrences_batch_shares_dates_per_zone_and_rule(monkeypatch):
+    calls = []
+    rule_dates = recurrence._rule_dates
+    monkeypatch.setattr(recurrence, "_rule_dates", lambda rule, first, last: calls.append(rule) or rule_dates(rule, first, last))
+    # Three Mondays with different start dates and times, one daily event.
+    events = [
+        _event(datetime.datetime(2025, 3, 3, 9, 0, tzinfo=UTC), weekly=0),
+        _event(datetime.datetime(2025, 2, 24, 18, 30, tzinfo=UTC), weekly=0),
+        _event(datetime.datetime(2025, 3, 17, 7, 15, tzinfo=UTC), weekly=0),
+        _event(datetime.datetime(2025, 3, 1, 12, 0, tzinfo=UTC), daily=True),
+    ]
+    start = datetime.datetime(2025, 3, 1, tzinfo=UTC)
+    end = datetime.datetime(2025, 3, 25, tzinfo=UTC)
+
+    occurrences = expand_occurrences_batch(events, start, end)
+
+    assert calls == [("weekly", 0), ("daily",)]
+    days = [[occurrence.day for event, occurrence in occurrences if event is source] for source in events[:3]]
+    assert days == [[3, 10, 17, 24], [3, 10, 17, 24], [17, 24]]
+    assert len(occurrences) == 10 + 24
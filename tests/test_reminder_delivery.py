@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from reminder_delivery import ReminderDispatcher, TokenBucket
+from tests.fakes import DummyBot
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_out_tokens():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    # The first token is free, the other three wait 1/50 s each.
+    assert time.monotonic() - started >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_after_telegram_flood_wait():
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RetryAfter(retry_after=0)
+
+    dispatcher = ReminderDispatcher(concurrency=2, retries=2)
+    delivered = await dispatcher.deliver([("tg", 1, send)])
+
+    assert delivered == 1
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_retries_after_max_429_and_isolates_failures():
+    calls: dict[int, int] = {1: 0, 2: 0}
+
+    async def send_rate_limited():
+        calls[1] += 1
+        if calls[1] == 1:
+            request = httpx.Request("POST", "https://example.com/messages")
+            response = httpx.Response(429, headers={"Retry-After": "0"}, request=request)
+            raise httpx.HTTPStatusError("Too many requests", request=request, response=response)
+
+    async def send_broken():
+        calls[2] += 1
+        raise RuntimeError("boom")
+
+    dispatcher = ReminderDispatcher(concurrency=2, retries=2)
+    delivered = await dispatcher.deliver([("max", 1, send_rate_limited), ("max", 2, send_broken)])
+
+    assert delivered == 1
+    assert calls == {1: 2, 2: 1}
+
+
+@pytest.mark.asyncio
+async def test_sharded_dispatcher_takes_its_share_of_the_platform_rate(monkeypatch):
+    import reminder_delivery
+
+    monkeypatch.setattr(reminder_delivery, "TG_RATE_LIMIT", 100.0)
+
+    async def send():
+        return None
+
+    jobs = [("tg", chat_id, send) for chat_id in range(27)]
+    started = time.monotonic()
+    assert await ReminderDispatcher(shards=4).deliver(jobs) == 27
+    # 25 messages/sec for each of 4 shards: the burst of 25 is free, the other two wait 1/25 s each.
+    assert time.monotonic() - started >= 0.08
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_reports_unreachable_recipients_without_retry():
+    calls = {"blocked": 0, "gone": 0, "max": 0}
+
+    async def send_blocked():
+        calls["blocked"] += 1
+        raise Forbidden("Forbidden: bot was blocked by the user")
+
+    async def send_gone():
+        calls["gone"] += 1
+        raise BadRequest("Chat not found")
+
+    async def send_max_denied():
+        calls["max"] += 1
+        request = httpx.Request("POST", "https://example.com/messages")
+        raise httpx.HTTPStatusError("Forbidden", request=request, response=httpx.Response(403, request=request))
+
+    async def send_ok():
+        return None
+
+    dispatcher = ReminderDispatcher(concurrency=2, retries=2)
+    jobs = [("tg", 1, send_blocked), ("tg", 2, send_gone), ("tg", 3, send_ok), ("max", 4, send_max_denied)]
+    delivered = await dispatcher.deliver(jobs)
+
+    assert delivered == 1
+    assert calls == {"blocked": 1, "gone": 1, "max": 1}
+    assert dispatcher.pop_unreachable() == {"tg": [1, 2], "max": [4]}
+    assert dispatcher.pop_unreachable() == {}
+    assert dispatcher.pop_reached() == {"tg": [3]}
+
+
+@pytest.mark.asyncio
+async def test_reminder_senders_use_locale_from_reminder_row(monkeypatch):
+    import datetime
+
+    from cron_handler import send_max_reminder, send_tg_reminder
+    from database.db_controller import DBController
+
+    lookups = 0
+
+    async def count_lookup(*args, **kwargs):
+        nonlocal lookups
+        lookups += 1
+
+    monkeypatch.setattr(DBController, "get_user", staticmethod(count_lookup))
+    bot = DummyBot()
+
+    event = {"event_id": 1, "tg_id": 10, "max_id": 20, "language_code": "en", "start_time": datetime.time(9, 0), "description": "Call"}
+    await send_tg_reminder(bot, event, lead_minutes=0)
+    await send_max_reminder(bot, event, lead_minutes=60)
+    await send_max_reminder(bot, event, lead_minutes=15)
+
+    sent = bot.sent
+    assert lookups == 0
+    assert sent[0]["chat_id"] == 10
+    assert sent[0]["text"].startswith("Event reminder")
+    assert sent[1]["user_id"] == 20
+    assert sent[1]["locale"] == "en"
+    assert "In 1 hour:" in sent[1]["text"]
+    assert "In 15 min:" in sent[2]["text"]
+
+
+def test_build_delivery_jobs_coalesces_reminders_per_recipient():
+    import datetime
+
+    from cron_handler import _build_reminders_text, build_delivery_jobs
+
+    def reminder(event_id: int, tg_id: int, max_id: int | None = None) -> dict:
+        return {
+            "event_id": event_id,
+            "tg_id": tg_id,
+            "max_id": max_id,
+            "language_code": "en",
+            "start_time": datetime.time(9, 0),
+            "description": f"Event {event_id}",
+        }
+
+    items = [(0, reminder(1, 10, 20)), (60, reminder(2, 10, 20)), (0, reminder(3, 11))]
+    jobs = build_delivery_jobs(items, bot=None, max_api=None)
+
+    assert [(platform, chat_id, len(send.args[1])) for platform, chat_id, send in jobs] == [("tg", 10, 2), ("max", 20, 2), ("tg", 11, 1)]
+    text = _build_reminders_text(jobs[0][2].args[1], locale="en")
+    assert text.splitlines() == ["Event reminders", "Now:", "09:00 Event 1", "In 1 hour:", "09:00 Event 2"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_reminder_has_reschedule_buttons_per_event():
+    import datetime
+
+    from cron_handler import send_tg_reminders
+
+    bot = DummyBot()
+
+    events = [
+        {"event_id": event_id, "tg_id": 10, "language_code": "ru", "start_time": datetime.time(9, 0), "description": "Звонок"}
+        for event_id in (1, 2)
+    ]
+    await send_tg_reminders(bot, [(0, event) for event in events])
+
+    assert len(bot.sent) == 1
+    keyboard = bot.sent[0]["reply_markup"].inline_keyboard
+    assert [[button.callback_data for button in row] for row in keyboard] == [
+        ["reschedule_event_1_hour", "reschedule_event_1_day"],
+        ["reschedule_event_2_hour", "reschedule_event_2_day"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_send_digests_groups_users_by_time_zone(db_session_fixture, monkeypatch):
+    import datetime
+
+    import cron_handler
+    from database.db_controller import db_controller
+    from entities import Event, Recurrent, TgUser
+
+    monkeypatch.setattr(cron_handler, "AsyncSessionLocal", db_session_fixture)
+    for tg_id, zone, digest in ((1, "Europe/Moscow", (8, 0)), (2, "Asia/Vladivostok", (15, 0)), (3, "Europe/Moscow", (9, 0))):
+        await db_controller.save_update_user(TgUser(id=tg_id, time_zone=zone, language_code="en"))
+        await db_controller.set_digest_time(tg_id, datetime.time(*digest))
+        event = Event(event_date=datetime.date(2025, 3, 10), description=f"Plan {tg_id}", start_time=datetime.time(18, 0), tg_id=tg_id)
+        await db_controller.save_event(event, tz_name=zone)
+    await db_controller.save_event(
+        Event(event_date=datetime.date(2025, 3, 1), description="Gym", start_time=datetime.time(7, 30), tg_id=2, recurrent=Recurrent.daily),
+        tz_name="Asia/Vladivostok",
+    )
+
+    bot = DummyBot()
+
+    # 05:00 UTC is 08:00 in Moscow and 15:00 in Vladivostok.
+    now = datetime.datetime(2025, 3, 10, 5, 0, tzinfo=datetime.timezone.utc)
+    delivered = await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher())
+
+    assert delivered == 2
+    texts = {item["chat_id"]: item["text"].splitlines() for item in bot.sent}
+    assert texts == {
+        1: ["Your events for 10 March 2025:", "18:00 Plan 1"],
+        2: ["Your events for 10 March 2025:", "07:30 Gym", "18:00 Plan 2"],
+    }
+
+    # A replayed minute finds both digests in the ledger.
+    assert await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher()) == 0
+    assert len(bot.sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_digest_is_sent_by_the_next_run(db_session_fixture, monkeypatch):
+    import datetime
+
+    import cron_handler
+    from database.db_controller import db_controller
+    from entities import Event, TgUser
+
+    monkeypatch.setattr(cron_handler, "AsyncSessionLocal", db_session_fixture)
+    await db_controller.save_update_user(TgUser(id=1, time_zone="Europe/Moscow", language_code="en"))
+    await db_controller.set_digest_time(1, datetime.time(8, 0))
+    await db_controller.save_event(
+        Event(event_date=datetime.date(2025, 3, 10), description="Plan", start_time=datetime.time(18, 0), tg_id=1), tz_name="Europe/Moscow"
+    )
+
+    bot = DummyBot(fail=True)
+
+    now = datetime.datetime(2025, 3, 10, 5, 0, tzinfo=datetime.timezone.utc)
+    assert await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher()) == 0
+    bot.fail = False
+    assert await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher()) == 1
+    assert await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher()) == 0
+    assert len(bot.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_deliver_unsent_releases_failed_claims(db_session_fixture):
+    import datetime
+
+    from cron_handler import deliver_unsent
+    from database.db_controller import db_controller
+    from entities import Event
+
+    event_id = await db_controller.save_event(
+        Event(event_date=datetime.date(2025, 3, 3), description="Call", start_time=datetime.time(12, 0), tg_id=10)
+    )
+    occurrence = {
+        "event_id": event_id,
+        "event_dt": datetime.datetime(2025, 3, 3, 9, 0, tzinfo=datetime.timezone.utc),
+        "tg_id": 10,
+        "max_id": None,
+        "language_code": "en",
+        "start_time": datetime.time(12, 0),
+        "description": "Call",
+    }
+    key = (event_id, occurrence["event_dt"], 0)
+    bot = DummyBot(fail=True)
+
+    dispatcher = ReminderDispatcher(concurrency=2, retries=0)
+    assert await deliver_unsent([(0, occurrence)], bot, None, dispatcher) == 0
+    bot.fail = False
+    assert await deliver_unsent([(0, occurrence)], bot, None, dispatcher) == 1
+    assert await deliver_unsent([(0, occurrence)], bot, None, dispatcher) == 0
+    assert len(bot.sent) == 1
+    assert await db_controller.claim_reminders([key], reclaim_before=datetime.datetime.now(datetime.timezone.utc)) == set()
+
+
+@pytest.mark.asyncio
+async def test_claims_of_a_crashed_run_are_taken_over(db_session_fixture):
+    import datetime
+
+    from database.db_controller import db_controller
+
+    key = (1, datetime.datetime(2025, 3, 3, 9, 0, tzinfo=datetime.timezone.utc), 0)
+    assert await db_controller.claim_reminders([key]) == {key}
+    leased_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=1)
+
+    # The claim was never confirmed: a run holding an older lease may not send it, the next one takes it over.
+    assert await db_controller.claim_reminders([key]) == set()
+    assert await db_controller.claim_reminders([key], reclaim_before=leased_at) == {key}
+    await db_controller.confirm_reminders([key])
+    assert await db_controller.claim_reminders([key], reclaim_before=leased_at + datetime.timedelta(minutes=1)) == set()
+
+
+@pytest.mark.asyncio
+async def test_send_digests_skips_cancellations_on_the_local_date(db_session_fixture, monkeypatch):
+    import datetime
+
+    import cron_handler
+    from database.db_controller import db_controller
+    from entities import Event, Recurrent, TgUser
+
+    monkeypatch.setattr(cron_handler, "AsyncSessionLocal", db_session_fixture)
+    await db_controller.save_update_user(TgUser(id=1, time_zone="Asia/Vladivostok", language_code="en"))
+    await db_controller.set_digest_time(1, datetime.time(7, 0))
+    gym = Event(event_date=datetime.date(2025, 3, 1), description="Gym", start_time=datetime.time(8, 0), tg_id=1, recurrent=Recurrent.daily)
+    gym_id = await db_controller.save_event(gym, tz_name="Asia/Vladivostok")
+    await db_controller.create_cancel_event(gym_id, datetime.date(2025, 3, 11))
+
+    bot = DummyBot()
+
+    # 21:00 UTC on the 10th is 07:00 on the 11th in Vladivostok: the 08:00 gym of the 11th is cancelled.
+    for day in (10, 11):
+        now = datetime.datetime(2025, 3, day, 21, 0, tzinfo=datetime.timezone.utc)
+        await cron_handler.send_digests(now, None, bot, None, cron_handler.ReminderDispatcher())
+
+    assert [item["text"].splitlines() for item in bot.sent] == [["Your events for 12 March 2025:", "08:00 Gym"]]
+
+
+@pytest.mark.asyncio
+async def test_delivered_message_resets_consecutive_failures(db_session_fixture):
+    from cron_handler import deliver_jobs
+    from database.db_controller import db_controller
+    from entities import TgUser
+
+    await db_controller.save_update_user(TgUser(id=10))
+    await db_controller.record_delivery_failures([10], platform="tg")
+    await db_controller.record_delivery_failures([10], platform="tg")
+
+    async def send_ok():
+        return None
+
+    assert await deliver_jobs([("tg", 10, send_ok)], ReminderDispatcher()) == [True]
+    user = await db_controller.load_request_user(10, platform="tg")
+    assert user.profile["tg_delivery_failures"] == 0
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import datetime
+from datetime import timedelta, timezone
+
+import pytest
+
+from database.db_controller import db_controller
+from entities import Event, Recurrent
+from reminder_scheduler import CHECKPOINT_NAME, ReminderScheduler
+from tests.fakes import DummyBot
+
+
+@pytest.mark.asyncio
+async def test_scheduler_loads_window_and_pops_due_reminders(db_session_fixture):
+    event_date = datetime.date(2025, 3, 3)
+    event = Event(event_date=event_date, description="Standup", start_time=datetime.time(12, 0), tg_id=5, recurrent=Recurrent.daily)
+    await db_controller.save_event(event)
+
+    scheduler = ReminderScheduler(window_hours=6, resync_minutes=5)
+    now = datetime.datetime(2025, 3, 10, 8, 0, tzinfo=timezone.utc)
+    await scheduler.refresh(now)
+
+    # 09:00 UTC occurrence: one hour-ahead reminder at 08:00 and one on time at 09:00.
+    assert len(scheduler) == 2
+    due = scheduler.pop_due(now)
+    assert [(lead, item["tg_id"]) for lead, item in due] == [(60, 5)]
+    assert scheduler.pop_due(now + timedelta(minutes=59)) == []
+    due = scheduler.pop_due(now + timedelta(hours=1))
+    assert [(lead, item["description"]) for lead, item in due] == [(0, "Standup")]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_extends_window_incrementally(db_session_fixture):
+    event_date = datetime.date(2025, 3, 3)
+    event = Event(event_date=event_date, description="Late", start_time=datetime.time(20, 0), tg_id=5, recurrent=Recurrent.daily)
+    await db_controller.save_event(event)
+
+    scheduler = ReminderScheduler(window_hours=6, resync_minutes=60)
+    now = datetime.datetime(2025, 3, 10, 10, 0, tzinfo=timezone.utc)
+    await scheduler.refresh(now)
+    assert len(scheduler) == 0
+
+    await scheduler.refresh(now + timedelta(hours=1))
+    assert len(scheduler) == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_catches_up_missed_minutes_once(db_session_fixture):
+    event_date = datetime.date(2025, 3, 3)
+    event = Event(event_date=event_date, description="Standup", start_time=datetime.time(12, 0), tg_id=5, recurrent=Recurrent.daily)
+    await db_controller.save_event(event)
+
+    # The previous process completed 08:30 and came back at 09:10: the 09:00 reminder was missed.
+    now = datetime.datetime(2025, 3, 10, 9, 10, tzinfo=timezone.utc)
+    await db_controller.set_reminder_checkpoint(CHECKPOINT_NAME, now - timedelta(minutes=40))
+    scheduler = ReminderScheduler(window_hours=1, resync_minutes=5)
+    await scheduler.refresh(now)
+    assert await scheduler.catch_up(now) == 1
+
+    due = scheduler.pop_due(now)
+    assert [(lead, item["event_dt"].hour) for lead, item in due] == [(0, 9)]
+    keys = [(item["event_id"], item["event_dt"], lead) for lead, item in due]
+    assert await db_controller.claim_reminders(keys) == set(keys)
+    # A second process replaying the same window must not send it again.
+    assert await db_controller.claim_reminders(keys) == set()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_reminders_of_deleted_and_moved_events(db_session_fixture):
+    from reminder_delivery import ReminderDispatcher
+
+    event_date = datetime.date(2025, 3, 3)
+    kept = Event(event_date=event_date, description="Standup", start_time=datetime.time(12, 0), tg_id=5, recurrent=Recurrent.daily)
+    kept_id = await db_controller.save_event(kept)
+    deleted_id = await db_controller.save_event(kept.model_copy(update={"description": "Gone"}))
+    moved_id = await db_controller.save_event(kept.model_copy(update={"description": "Moved"}))
+
+    scheduler = ReminderScheduler(window_hours=6, resync_minutes=5)
+    now = datetime.datetime(2025, 3, 10, 9, 0, tzinfo=timezone.utc)
+    await scheduler.refresh(now)
+    await db_controller.delete_event_by_id(deleted_id)
+    await db_controller.update_event(moved_id, kept.model_copy(update={"description": "Moved", "start_time": datetime.time(13, 0)}))
+
+    bot = DummyBot()
+    assert await scheduler.fire_due(now, bot, None, ReminderDispatcher()) == 1
+    assert [item["text"].splitlines()[-1] for item in bot.sent] == ["Описание: Standup"]
+    assert await db_controller.claim_reminders([(kept_id, now, 0)]) == set()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_keeps_due_reminders_when_delivery_fails(db_session_fixture, monkeypatch):
+    import reminder_scheduler
+    from reminder_delivery import ReminderDispatcher
+
+    event = Event(event_date=datetime.date(2025, 3, 3), description="Standup", start_time=datetime.time(12, 0), tg_id=5)
+    await db_controller.save_event(event.model_copy(update={"recurrent": Recurrent.daily}))
+    scheduler = ReminderScheduler(window_hours=6, resync_minutes=5)
+    now = datetime.datetime(2025, 3, 10, 9, 0, tzinfo=timezone.utc)
+    await scheduler.refresh(now)
+    queued = len(scheduler)
+
+    deliver_unsent = reminder_scheduler.deliver_unsent
+    broken = True
+
+    async def flaky_delivery(*args, **kwargs):
+        if broken:
+            raise RuntimeError("database is gone")
+        return await deliver_unsent(*args, **kwargs)
+
+    monkeypatch.setattr(reminder_scheduler, "deliver_unsent", flaky_delivery)
+    with pytest.raises(RuntimeError):
+        await scheduler.fire_due(now, DummyBot(), None, ReminderDispatcher())
+    assert len(scheduler) == queued
+
+    broken = False
+    bot = DummyBot()
+    assert await scheduler.fire_due(now + timedelta(minutes=1), bot, None, ReminderDispatcher()) == 1
+    assert len(bot.sent) == 1
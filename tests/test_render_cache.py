@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import datetime
+
+from database.db_controller import db_controller
+from database.identity_cache import bind_request_user, reset_request_user
+from database.render_cache import RenderCache, calendar_cache
+from entities import Event, Recurrent, TgUser
+
+
+def _event(day: datetime.date, **kwargs) -> Event:
+    return Event(event_date=day, description="Event", start_time=datetime.time(12, 0), tg_id=1, **kwargs)
+
+
+def test_render_cache_is_bounded_lru():
+    cache = RenderCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), len(cache)) == (1, 3, 2)
+
+
+def test_render_cache_entries_expire():
+    cache = RenderCache(maxsize=10, ttl=-1)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+async def test_event_writes_bump_events_version(db_session_fixture):
+    await db_controller.save_update_user(TgUser(id=1))
+    assert await db_controller.get_events_version(1) == 0
+
+    event_id = await db_controller.save_event(_event(datetime.date(2025, 3, 3), recurrent=Recurrent.daily))
+    assert await db_controller.get_events_version(1) == 1
+
+    await db_controller.create_cancel_event(event_id=event_id, cancel_date=datetime.date(2025, 3, 4))
+    await db_controller.delete_event_by_id(event_id)
+
+    assert await db_controller.get_events_version(1) == 3
+    assert await db_controller.get_events_version(404) == 0
+
+
+async def test_calendar_navigation_is_served_from_render_cache(db_session_fixture, capture_statements):
+    from handlers.cal import generate_calendar, generate_week_calendar
+
+    await db_controller.save_update_user(TgUser(id=1))
+    await db_controller.save_event(_event(datetime.date(2025, 3, 3)))
+    token = bind_request_user("tg", 1, await db_controller.load_request_user(1, platform="tg"))
+    try:
+        with capture_statements() as statements:
+            march = await generate_calendar(user_id=1, year=2025, month=3, locale="ru")
+            week = await generate_week_calendar(user_id=1, year=2025, month=3, day=3, locale="ru")
+            rendered = len(statements)
+            assert await generate_calendar(user_id=1, year=2025, month=3, locale="ru") is march
+            assert await generate_week_calendar(user_id=1, year=2025, month=3, day=3, locale="ru") is week
+            assert len(statements) == rendered
+
+            await db_controller.save_event(_event(datetime.date(2025, 3, 3)))
+            updated = await generate_calendar(user_id=1, year=2025, month=3, locale="ru")
+    finally:
+        reset_request_user(token)
+
+    assert calendar_cache.hits == 2
+    assert updated is not march
+    labels = [button.text for row in updated.inline_keyboard for button in row]
+    assert "3²" in labels
+
+
+async def test_max_calendar_hands_out_copies(db_session_fixture):
+    from max_bot.handlers.cal import generate_calendar
+
+    first = await generate_calendar(user_id=2, year=2025, month=3, locale="ru")
+    first.inline_keyboard.append([])
+    second = await generate_calendar(user_id=2, year=2025, month=3, locale="ru")
+
+    assert calendar_cache.hits == 1
+    assert len(second.inline_keyboard) == len(first.inline_keyboard) - 1